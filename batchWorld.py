@@ -0,0 +1,247 @@
+# batchWorld.py
+#
+# Many copies of the Wumpus World, stepped together.
+#
+# A World holds one game and moves things around one Pose at a
+# time. That is fine when we want to watch a game, but when scoring
+# an agent over thousands of seeds most of the time goes on the Python
+# overhead of stepping each World. BatchWorld keeps N games as NumPy
+# arrays and applies each of the World update rules to all of them at
+# once.
+#
+# The rules are the same as in world.py:
+#
+# - Link moves one square (or bumps into the edge and stays put),
+#   slipping sideways if config.nonDeterministic is set;
+# - Link loots any gold in the square they move into;
+# - Wumpus that are closer than config.senseDistance head towards
+#   Link, other Wumpus make a random move;
+# - a game is lost if Link is in the same square as a Wumpus or a pit,
+#   and won once all the gold has gone (winning takes precedence, as
+#   it does in World.isEnded).
+#
+# Games that have ended stay frozen while the rest carry on.
+#
+# The random draws are made with a NumPy Generator rather than the
+# random module, so a BatchWorld does not replay the same random
+# sequence as a set of Worlds, but each rule makes the same choices
+# with the same probabilities.
+#
+# Needs NumPy, unlike the rest of the code.
+
+import numpy as np
+import config
+from utils import Directions, State
+
+# Directions as indices into the lookup tables below. These are the
+# values of the Directions enum.
+NORTH = Directions.NORTH.value
+SOUTH = Directions.SOUTH.value
+EAST  = Directions.EAST.value
+WEST  = Directions.WEST.value
+
+# Change in x and y for each direction (index 0 is unused).
+DX = np.array([0, 0, 0, 1, -1])
+DY = np.array([0, 1, -1, 0, 0])
+
+# Where a sideways slip goes, as in World.sideMove.
+LEFT  = np.array([0, WEST, EAST, NORTH, SOUTH])
+RIGHT = np.array([0, EAST, WEST, SOUTH, NORTH])
+
+class BatchWorld():
+
+    # Set up n random games with the sizes and numbers in config.
+    #
+    # seed can be anything np.random.default_rng accepts. Layouts are
+    # drawn uniformly from all placements of the Wumpus, Link, gold
+    # and pits in distinct cells, which is the same distribution as
+    # World gives.
+    def __init__(self, n, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.n = n
+        self.maxX = config.worldLength - 1
+        self.maxY = config.worldBreadth - 1
+        self.width = self.maxX + 1
+        self.height = self.maxY + 1
+        cells = self.width * self.height
+
+        nW = config.numberOfWumpus
+        nG = config.numberOfGold
+        nP = config.numberOfPits
+        needed = nW + 1 + nG + nP
+        if needed > cells:
+            raise ValueError("Can't fit " + str(needed) + " things into " + str(cells) + " cells")
+
+        # Sampling without replacement, one row per game: the first
+        # 'needed' columns of a random permutation of the cells.
+        picks = self.rng.random((n, cells)).argsort(axis=1)[:, :needed]
+        wumpus = picks[:, :nW]
+        link = picks[:, nW]
+        gold = picks[:, nW + 1:nW + 1 + nG]
+        pits = picks[:, nW + 1 + nG:]
+
+        self.setLayout(link, wumpus, gold, pits)
+
+    # Build a BatchWorld that holds the same games as a list of
+    # World objects. Handy for checking the two agree.
+    @classmethod
+    def fromWorlds(cls, worlds):
+        batch = cls.__new__(cls)
+        batch.rng = np.random.default_rng()
+        batch.n = len(worlds)
+        batch.maxX = worlds[0].maxX
+        batch.maxY = worlds[0].maxY
+        batch.width = batch.maxX + 1
+        batch.height = batch.maxY + 1
+        link = np.array([w.cellOf(w.lLoc) for w in worlds])
+        wumpus = np.array([[w.cellOf(loc) for loc in w.wLoc] for w in worlds]).reshape(batch.n, -1)
+        gold = [[w.cellOf(loc) for loc in w.gLoc] for w in worlds]
+        pits = [[w.cellOf(loc) for loc in w.pLoc] for w in worlds]
+        batch.setLayout(link, wumpus, gold, pits)
+        batch.status[:] = [w.status.value for w in worlds]
+        return batch
+
+    # Fill in the arrays from cell ids. link is (n,), wumpus is (n, k)
+    # and gold and pits are a list of cell ids for each game.
+    def setLayout(self, link, wumpus, gold, pits):
+        cells = self.width * self.height
+
+        # Link and Wumpus coordinates. wumpus[:, i, 0] is the x of
+        # Wumpus i in each game.
+        link = np.asarray(link)
+        self.link = np.stack([link % self.width, link // self.width], axis=-1)
+        wumpus = np.asarray(wumpus).reshape(self.n, -1)
+        self.wumpus = np.stack([wumpus % self.width, wumpus // self.width], axis=-1)
+
+        # Pits and gold are masks over the cells of each game.
+        self.pits = np.zeros((self.n, cells), dtype=bool)
+        self.gold = np.zeros((self.n, cells), dtype=bool)
+        for i in range(self.n):
+            self.pits[i, list(pits[i])] = True
+            self.gold[i, list(gold[i])] = True
+        self.goldLeft = self.gold.sum(axis=1)
+
+        self.status = np.full(self.n, State.PLAY.value, dtype=np.int8)
+        self.looted = np.zeros(self.n, dtype=bool)
+
+    #
+    # Access Methods
+    #
+
+    # Which games are still being played?
+    def active(self):
+        return self.status == State.PLAY.value
+
+    # Cell id of Link in each game.
+    def linkCells(self):
+        return self.link[:, 1] * self.width + self.link[:, 0]
+
+    #
+    # Methods
+    #
+    # These do what the World methods of the same name do, for every
+    # game that is still being played.
+
+    # Implement the moves chosen for Link. directions holds one
+    # Directions value (1-4) per game; entries for games that have
+    # ended are ignored.
+    #
+    # Each update works on the rows of the games still in play, so
+    # the cost of a step goes down as games end.
+    def updateLink(self, directions):
+        live = np.flatnonzero(self.active())
+        self.looted[:] = False
+        directions = self.probabilisticMotion(np.asarray(directions)[live])
+
+        x = np.clip(self.link[live, 0] + DX[directions], 0, self.maxX)
+        y = np.clip(self.link[live, 1] + DY[directions], 0, self.maxY)
+        self.link[live, 0] = x
+        self.link[live, 1] = y
+
+        # Did Link just loot some gold?
+        cell = y * self.width + x
+        looted = self.gold[live, cell]
+        self.gold[live[looted], cell[looted]] = False
+        self.goldLeft[live] -= looted
+        self.looted[live] = looted
+
+    # Slip to one side with probability 1 - directionProbability, as
+    # World.probabilisticMotion does.
+    def probabilisticMotion(self, directions):
+        if not config.nonDeterministic:
+            return directions
+        slip = self.rng.random(len(directions)) >= config.directionProbability
+        left = self.rng.random(len(directions)) > 0.5
+        side = np.where(left, LEFT[directions], RIGHT[directions])
+        return np.where(slip, side, directions)
+
+    # Move the Wumpus if that is appropriate.
+    def updateWumpus(self):
+        if not config.dynamic:
+            return
+        live = np.flatnonzero(self.active())
+        lx = self.link[live, None, 0]
+        ly = self.link[live, None, 1]
+        wx = self.wumpus[live, :, 0]
+        wy = self.wumpus[live, :, 1]
+
+        # Which Wumpus can sense Link?
+        chasing = (wx - lx) ** 2 + (wy - ly) ** 2 < config.senseDistance ** 2
+
+        # moveToLink: close the gap along the axis that differs, or
+        # pick one at random if both do.
+        dice = self.rng.random(wx.shape)
+        moveY = (wx == lx) | ((wy != ly) & (dice > 0.5))
+        chaseX = np.where(moveY, wx, wx + np.sign(lx - wx))
+        chaseY = np.where(moveY, wy + np.sign(ly - wy), wy)
+
+        # makeRandomMove: pick an axis, then a change of -1, 0 or 1.
+        dice = self.rng.random(wx.shape)
+        change = self.rng.integers(0, 3, wx.shape) - 1
+        moveX = dice > 0.5
+        randomX = np.where(moveX, np.clip(wx - change, 0, self.maxX), wx)
+        randomY = np.where(moveX, wy, np.clip(wy - change, 0, self.maxY))
+
+        self.wumpus[live, :, 0] = np.where(chasing, chaseX, randomX)
+        self.wumpus[live, :, 1] = np.where(chasing, chaseY, randomY)
+
+    # Update the status of every game that is still being played, and
+    # return a mask of the games that have ended.
+    def isEnded(self):
+        live = np.flatnonzero(self.active())
+        link = self.link[live]
+        metWumpus = (self.wumpus[live] == link[:, None, :]).all(axis=-1).any(axis=-1)
+        inPit = self.pits[live, link[:, 1] * self.width + link[:, 0]]
+        self.status[live[metWumpus | inPit]] = State.LOST.value
+        self.status[live[self.goldLeft[live] == 0]] = State.WON.value
+        return ~self.active()
+
+    # One turn of game.main for every game still being played: move
+    # Link, move the Wumpus, then check for the end of the game.
+    def step(self, directions):
+        self.updateLink(directions)
+        self.updateWumpus()
+        return self.isEnded()
+
+# Play n games with a Link who moves at random, and report how fast
+# that goes. Useful as a baseline, and to check the speed of the
+# batch itself.
+def main(n=10000, maxSteps=1000):
+    import time
+    batch = BatchWorld(n)
+    steps = 0
+    start = time.time()
+    for i in range(maxSteps):
+        live = batch.active()
+        if not live.any():
+            break
+        steps += int(live.sum())
+        batch.step(batch.rng.integers(NORTH, WEST + 1, n))
+    elapsed = time.time() - start
+    won = int((batch.status == State.WON.value).sum())
+    lost = int((batch.status == State.LOST.value).sum())
+    print("won:", won, "lost:", lost, "unfinished:", n - won - lost)
+    print("steps:", steps, "in", round(elapsed, 2), "s (", round(steps / elapsed), "steps/s )")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# belief.py
+#
+# Keeping track of what Link knows about the world when they can only
+# see part of it (config.partialVisibility).
+#
+# Link gets what World.observe gives them: whether their own cell is
+# smelly, windy or glitters, and what is in the few cells in front of
+# them. From that they keep, for every cell:
+#
+# - pitFree: it is known there is no pit there (Link has seen it, or
+#   it is next to a cell that isn't windy). Pits never move, so this
+#   only grows;
+# - wumpus: a Wumpus could be there. Everything is possible at the
+#   start, and after each turn the set is moved on the way the Wumpus
+#   move (see World.updateWumpus) before what Link sees and smells is
+#   taken away from it. A Wumpus close enough to sense Link heads
+#   straight for them, so those cells move a cell towards Link; the
+#   others may have moved a cell in any direction, or not at all;
+# - tracked: the part of wumpus that comes from Wumpus Link has seen
+#   or smelled, spreading and shrinking the same way. These are the
+#   Wumpus Link can keep away from; one that has never been noticed
+#   could be anywhere;
+# - gold: there could be gold there (not yet ruled out by seeing the
+#   cell, or by a cell next to it not glittering), and goldSeen, gold
+#   Link has seen and not yet picked up.
+#
+# Each of these is a bitset: a Python int with bit c set for cell c
+# (c = y * width + x, as everywhere else). A turn's update is a
+# handful of shifts, ands and ors over the whole grid, which Python
+# does a machine word at a time, so even on a 200x200 grid it costs
+# microseconds. Only the searches look at single cells, and for those
+# a bitset is turned into bytes once a turn (see testable).
+
+import math
+
+class Belief():
+
+    # For a width by height grid with successor table successors
+    # (World.successors), with Link starting in cell start.
+    def __init__(self, width, height, successors, start):
+        self.width = width
+        self.height = height
+        self.successors = successors
+        cells = width * height
+        self.all = (1 << cells) - 1
+
+        # The cells in the first and last columns, which shifting one
+        # cell east or west would wrap onto the next row.
+        column = 0
+        for y in range(height):
+            column |= 1 << (y * width)
+        self.notFirst = self.all & ~column
+        self.notLast = self.all & ~(column << (width - 1))
+        self.column = column
+        self.row = (1 << width) - 1
+
+        here = ~(1 << start) & self.all
+        self.pitFree = 1 << start
+        self.wumpus = here
+        self.tracked = 0
+        self.gold = here
+        self.goldSeen = 0
+
+    # The cells next to the cells in bits.
+    def spread(self, bits):
+        width = self.width
+        return (((bits << width) & self.all) | (bits >> width)
+                | ((bits << 1) & self.notFirst) | ((bits >> 1) & self.notLast))
+
+    # Where Wumpus in the cells in bits could be after one move of
+    # theirs, with Link in cell and a Wumpus sensing Link from less
+    # than senseDistance away.
+    def move(self, bits, cell, senseDistance):
+        width = self.width
+        lx = cell % width
+        ly = cell // width
+
+        # The cells close enough to sense Link, a row at a time.
+        reach = math.ceil(senseDistance) - 1
+        sense = 0
+        for y in range(max(0, ly - reach), min(self.height - 1, ly + reach) + 1):
+            dy = y - ly
+            # Whole cells x with (x - lx)^2 + dy^2 < senseDistance^2.
+            across = math.sqrt(max(0, senseDistance ** 2 - dy ** 2))
+            dx = math.ceil(across) - 1
+            if dx < 0:
+                continue
+            first = max(0, lx - dx)
+            last = min(width - 1, lx + dx)
+            sense |= ((1 << (last - first + 1)) - 1) << (y * width + first)
+
+        # Chasing Wumpus close the gap along x or y (and one that has
+        # caught Link stays put).
+        chasing = bits & sense
+        left = self.column * ((1 << lx) - 1) # the columns west of Link
+        right = self.column * (self.row & ~((1 << (lx + 1)) - 1))
+        below = (1 << (ly * width)) - 1
+        above = self.all & ~((1 << ((ly + 1) * width)) - 1)
+        chased = ((chasing & (1 << cell)) | ((chasing & left) << 1) | ((chasing & right) >> 1)
+                  | ((chasing & below) << width) | ((chasing & above) >> width))
+
+        wandering = bits & ~sense
+        return chased | wandering | self.spread(wandering)
+
+    # The cells next to cell.
+    def around(self, cell):
+        bits = 0
+        for move, nextCell in self.successors[cell]:
+            bits |= 1 << nextCell
+        return bits
+
+    # Take in one turn's observation (see World.observe). If the
+    # Wumpus move (dynamic), call this once after every move they
+    # make; senseDistance is how close they have to be to sense Link.
+    def update(self, observation, dynamic=True, senseDistance=0):
+        cell, smelly, windy, glitter, seen, pits, wumpus, gold = observation
+        if dynamic:
+            self.wumpus = self.move(self.wumpus, cell, senseDistance)
+            self.tracked = self.move(self.tracked, cell, senseDistance)
+
+        # What Link sees is so.
+        self.pitFree |= seen & ~pits
+        self.wumpus = (self.wumpus & ~seen) | wumpus
+        self.tracked = (self.tracked & ~seen) | wumpus
+        self.gold = (self.gold & ~seen) | gold
+        self.goldSeen = (self.goldSeen & ~seen) | gold
+
+        # What Link feels is about the cells next to them.
+        around = self.around(cell)
+        if not windy:
+            self.pitFree |= around
+        if smelly:
+            self.tracked |= around & self.wumpus
+        else:
+            self.wumpus &= ~around
+            self.tracked &= ~around
+        if not glitter:
+            self.gold &= ~around
+            self.goldSeen &= ~around
+        self.tracked &= self.wumpus
+
+    # The cells Link can move into without walking into a pit or next
+    # to a Wumpus they know about.
+    def safe(self):
+        return self.pitFree & ~(self.tracked | self.spread(self.tracked))
+
+    # The cells worth heading for, best first: gold Link has seen, and
+    # safe cells next to where gold could be, from which Link will
+    # find out more.
+    def targets(self):
+        return [self.goldSeen, self.safe() & self.spread(self.gold)]
+
+    # A function from a cell id to True if the cell is in bits, for
+    # the searches to call. The bitset is turned into bytes once, so
+    # each test is an index rather than a shift of the whole int.
+    def testable(self, bits):
+        packed = bits.to_bytes((self.width * self.height + 7) // 8, 'little')
+        return lambda cell: packed[cell >> 3] >> (cell & 7) & 1 == 1
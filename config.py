@@ -18,6 +18,16 @@ numberOfWumpus = 2
 numberOfPits = 3
 numberOfGold = 2
 
+# Control layout generation
+#
+# If legacyLayout is True, things are placed by picking random
+# locations until an unused one comes up. This gives the same layouts
+# for a given seed as earlier versions did, so keep it if you are
+# comparing against results with your student ID. If it is False,
+# locations are sampled without replacement in one pass, which is
+# faster on crowded grids but gives different layouts.
+legacyLayout = True
+
 # Do we show graphics or not?
 headless = False
 
@@ -26,16 +36,91 @@ headless = False
 # If dynamic is True, then the Wumpus will move.
 dynamic = True
 
-# Control observability --- NOT YET IMPLEMENTED
+# Control observability
 #
 # If partialVisibility is True, Link will only see part of the
-# environment.
+# environment: they feel whether their own cell is smelly, windy or
+# glitters, and see what is in the cells in front of them, and keep
+# track of what they can work out from that (see belief.py). The
+# planner setting below is then not used.
 partialVisibility = False
 #
-# The limits of visibility when visibility is partial
+# The limits of visibility when visibility is partial: how many cells
+# Link can see ahead, and how many to either side of straight ahead.
 sideLimit = 1
 forwardLimit = 5
 
+# Control planning
+#
+# How Link works out where to go. "field" keeps a distance field
+# rooted at each gold and only redoes the parts the Wumpus have
+# changed, which is fastest when the Wumpus are few or do not
+# move. "dstar" uses D* Lite (see dstarLite.py), which repairs one
+# search towards all the gold after each move of the Wumpus, and
+# keeps the time per move flat on large grids with many moving Wumpus.
+# "spacetime" follows the same tour as "field" but plans each path
+# around where the Wumpus may be by the time Link gets there (see
+# spaceTime.py), looking spaceTimeHorizon moves ahead and keeping out
+# of cells a randomly moving Wumpus is more than spaceTimeRisk likely
+# to be in. "risk" makes one search a turn over a grid of risk costs
+# (see riskField.py; needs NumPy). "mdp" looks the move up in a policy
+# solved for the layout that allows for Link's moves slipping when
+# nonDeterministic is set (see mdp.py; needs NumPy), and is meant for
+# Wumpus that don't move. "jps" heads for the gold in the order of a
+# tour planned on straight-line distances, finding each path with jump
+# point search (see search.jumpPoint), which on large open grids
+# expands far fewer cells than A*. "rollout" tries each move out in
+# simulated futures (see rollout.py), spending rolloutBudget seconds a
+# turn on rollouts of up to rolloutDepth moves, rolloutBatch at a time
+# for each move and at most rolloutLimit in all, shared between
+# rolloutWorkers processes (0 means one per core).
+planner = "field"
+spaceTimeHorizon = 4
+spaceTimeRisk = 0.1
+rolloutBudget = 0.1
+rolloutDepth = 20
+rolloutBatch = 8
+rolloutLimit = 512
+rolloutWorkers = 0
+#
+# The longest Link may take to choose a move, in seconds, or None for
+# no limit. A planner that runs out of time keeps what it has done for
+# the next turn, and Link makes the best move it can find in what is
+# left (see Link.makeMove).
+moveBudget = 1.0
+
+# Control the puzzle
+#
+# How PuzzleWorld plans its way to the end state. "separate" plans a
+# path for Link and each Wumpus on its own, and moves them all at
+# once. "astar" searches over where Link and all the Wumpus are
+# together, moving one of them at a time, and finds a plan with the
+# fewest moves (see puzzleSolver.py). "bidirectional" finds the same
+# length of plan by breadth first search from the start and the end
+# state at once.
+puzzleSolver = "separate"
+
+# Control caching
+#
+# If layoutCache is the name of a directory, what Link works out that
+# depends only on the layout (distance tables, tours and MDP
+# policies) is kept there, so repeat runs of the same layout don't
+# work it out again (see layoutCache.py). Most of it depends on where
+# the Wumpus are too, so is only kept if they don't move (dynamic is
+# False). Once the files take up more than layoutCacheSize bytes, the
+# ones used longest ago are deleted.
+layoutCache = None
+layoutCacheSize = 64 * 1024 * 1024
+
+# Control reporting
+#
+# How much gets reported about each run. logLevel is a logging level
+# name: "INFO" reports game events like looting gold and the end of
+# the game, "WARNING" only reports problems. If stepEvents is True,
+# every step is reported as well, which is slow for long runs.
+logLevel = "INFO"
+stepEvents = False
+
 # Control determinism
 #
 # If nonDeterministic is True, Link's action model will be
@@ -0,0 +1,164 @@
+# dstarLite.py
+#
+# Incremental path planning for Link, using D* Lite (Koenig and
+# Likhachev, 2002).
+#
+# When the Wumpus move, only a few cells change from safe to unsafe
+# or back: the cells they leave and enter and the smelly cells around
+# them. Searching again from scratch after every move repeats almost
+# all of the previous search. D* Lite searches backwards from the goal
+# towards Link, and keeps its search between turns; when cells change
+# it repairs only the part of the search that depended on them, and
+# when Link moves it carries on from the new start.
+#
+# Here the search runs backwards from every remaining gold at once, so
+# g[cell] is the length of the shortest safe path from cell to the
+# nearest gold, and Link just moves to the neighbour with the smallest
+# g. Moving into a cell costs 1 if the cell is passable and infinity
+# if it is not.
+#
+# Use it by setting planner = "dstar" in config.py.
+
+import heapq
+import time
+from search import CHECK_EVERY, OutOfTime
+
+INFINITY = float('inf')
+
+class DStarLite():
+
+    # successors is a successor table like World.successors, width is
+    # the width of the grid, start is Link's cell, goals the cells of
+    # the gold and passable(cell) says if a cell can be moved into.
+    def __init__(self, successors, width, start, goals, passable):
+        self.successors = successors
+        self.width = width
+        self.passable = passable
+        cells = len(successors)
+        self.g = [INFINITY] * cells
+        self.rhs = [INFINITY] * cells
+        self.key = [None] * cells # the key a cell is queued with, or None
+        self.queue = []
+        self.start = start
+        self.last = start
+        self.km = 0
+        self.goals = set(goals)
+        for goal in self.goals:
+            self.rhs[goal] = 0
+            self.push(goal)
+
+    #
+    # The search
+    #
+
+    # Manhattan distance between two cells.
+    def heuristic(self, a, b):
+        width = self.width
+        return abs(a % width - b % width) + abs(a // width - b // width)
+
+    def calculateKey(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        return (best + self.heuristic(self.start, cell) + self.km, best)
+
+    # (Re)queue cell with its current key. Any older entry for it is
+    # left in the heap and skipped when it comes to the top.
+    def push(self, cell):
+        key = self.calculateKey(cell)
+        self.key[cell] = key
+        heapq.heappush(self.queue, (key, cell))
+
+    # Work out rhs for cell from its neighbours, and queue it if it is
+    # inconsistent.
+    def updateVertex(self, cell):
+        g = self.g
+        if cell not in self.goals:
+            best = INFINITY
+            passable = self.passable
+            for move, nextCell in self.successors[cell]:
+                if g[nextCell] + 1 < best and passable(nextCell):
+                    best = g[nextCell] + 1
+            self.rhs[cell] = best
+        if g[cell] != self.rhs[cell]:
+            self.push(cell)
+        else:
+            self.key[cell] = None
+
+    # Bring g up to date for the path from start. If deadline passes
+    # first, raises OutOfTime; the queue is left as it is, so the next
+    # call carries on where this one stopped.
+    def computeShortestPath(self, deadline=None):
+        g = self.g
+        rhs = self.rhs
+        queue = self.queue
+        successors = self.successors
+        start = self.start
+        expanded = 0
+        while queue:
+            expanded += 1
+            if deadline is not None and expanded % CHECK_EVERY == 0 and time.time() > deadline:
+                raise OutOfTime()
+            key, cell = queue[0]
+            if self.key[cell] != key: # stale entry
+                heapq.heappop(queue)
+                continue
+            if key >= self.calculateKey(start) and rhs[start] == g[start]:
+                break
+            heapq.heappop(queue)
+            self.key[cell] = None
+            if key < self.calculateKey(cell):
+                self.push(cell)
+            elif g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+                if self.passable(cell): # otherwise no neighbour can use it
+                    for move, previous in successors[cell]:
+                        if rhs[previous] > g[cell] + 1 and previous not in self.goals:
+                            rhs[previous] = g[cell] + 1
+                            self.push(previous)
+            else:
+                g[cell] = INFINITY
+                self.updateVertex(cell)
+                for move, previous in successors[cell]:
+                    self.updateVertex(previous)
+
+    #
+    # Keeping up with the world
+    #
+
+    # Link has moved to cell.
+    def moveStart(self, cell):
+        if cell != self.start:
+            self.start = cell
+            self.km += self.heuristic(self.last, cell)
+            self.last = cell
+
+    # Whether these cells are passable has changed. Moving into a cell
+    # is what costs, so it is their neighbours that need fixing.
+    def changeCells(self, cells):
+        done = set()
+        for cell in cells:
+            for move, previous in self.successors[cell]:
+                if previous not in done:
+                    done.add(previous)
+                    self.updateVertex(previous)
+
+    # The gold in cell has gone.
+    def removeGoal(self, cell):
+        if cell in self.goals:
+            self.goals.discard(cell)
+            self.updateVertex(cell)
+
+    # The first move of a shortest path from Link to the nearest gold,
+    # and the length of the path, or (None, -1) if no gold can be
+    # reached.
+    def nextMove(self, deadline=None):
+        self.computeShortestPath(deadline)
+        g = self.g
+        bestMove = None
+        best = INFINITY
+        for move, cell in self.successors[self.start]:
+            if g[cell] + 1 < best and self.passable(cell):
+                bestMove = move
+                best = g[cell] + 1
+        if bestMove is None:
+            return None, -1
+        return bestMove, best
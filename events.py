@@ -0,0 +1,71 @@
+# events.py
+#
+# Reporting what happens during a run.
+#
+# The game and puzzle code report what happens through here rather
+# than by calling print, so that how much gets reported can be set in
+# one place. Everything goes through the standard logging module:
+#
+# - game events (looting gold, Link dying, the end of a game or
+#   puzzle) are logged at INFO on the "wumpus" logger;
+# - per-step events (each move of a puzzle plan, the results of
+#   searches) are logged at DEBUG on the "wumpus.step" logger, and are
+#   off unless asked for.
+#
+# Code in the step loop should check stepEvents before calling step(),
+# so that when per-step events are off the loop does not even build
+# the message:
+#
+#   if events.stepEvents:
+#       events.step("Executing Move: %s", move)
+#
+# Messages use logging's %-style arguments, so they are only formatted
+# if they are going to be shown.
+
+import logging
+import sys
+import config
+
+logger = logging.getLogger("wumpus")
+stepLogger = logging.getLogger("wumpus.step")
+
+# Are per-step events being reported?
+stepEvents = False
+
+# Set how much is reported. level is a logging level name or number
+# for the "wumpus" logger, and steps says whether per-step events are
+# reported; either defaults to the setting in config. Safe to call more
+# than once.
+def setup(level=None, steps=None):
+    global stepEvents
+    if level is None:
+        level = config.logLevel
+    if steps is None:
+        steps = config.stepEvents
+
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+
+    stepEvents = steps
+    if steps:
+        stepLogger.setLevel(logging.DEBUG)
+    else:
+        stepLogger.setLevel(logging.NOTSET)
+
+# Report a game event.
+def info(message, *args):
+    logger.info(message, *args)
+
+# Report something that has gone wrong, but not badly enough to stop.
+def warning(message, *args):
+    logger.warning(message, *args)
+
+# Report a per-step event. Check stepEvents first.
+def step(message, *args):
+    stepLogger.debug(message, *args)
+
+setup()
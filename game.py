@@ -12,40 +12,65 @@
 
 from world import World
 from link  import Link
-from dungeon import Dungeon
+from recorder import TraceRecorder
 import random
 import config
+import events
 import utils
 import time
 import statistics
 
 # We explicitly define the main function to allow this to both be run
 # from the command line on its own, or invoked (from wumpus.py)
-def main():
+#
+# rng is the random number generator for this run (see
+# utils.makeRng). If it is None, the game uses the random module. If
+# tracePath is given, every step is recorded there (see recorder.py).
+def main(rng=None, tracePath=None):
     # How we set the game up. Create a world, then connect player and
     # display to it.
-    gameWorld = World()
+    gameWorld = World(rng)
     player = Link(gameWorld)
-    display = Dungeon(gameWorld)
+    # Check if we want a display of the game state. The import is
+    # here so that headless runs never need a window system.
+    if not config.headless:
+        from dungeon import Dungeon
+        display = Dungeon(gameWorld)
 
     # Uncomment this for a printout of world state at the start
     #utils.printGameState(gameWorld)
 
     # Show initial state
-    display.update()
-    time.sleep(1)
+    if not config.headless:
+        display.update()
+        time.sleep(1)
+    # Record the run, if asked to
+    recorder = None
+    if tracePath:
+        recorder = TraceRecorder(tracePath, gameWorld)
+
     # Now run...
     calc_time = []
     while not(gameWorld.isEnded()):
         start_time = time.time()
-        gameWorld.updateLink(player.makeMove())
+        # Link has to decide within config.moveBudget seconds
+        deadline = None
+        if config.moveBudget is not None:
+            deadline = start_time + config.moveBudget
+        gameWorld.updateLink(player.makeMove(deadline))
         end_time = time.time()-start_time
         calc_time.append(end_time)
         gameWorld.updateWumpus()
+        if recorder:
+            recorder.add(gameWorld, end_time)
         # Uncomment this for a printout of world state every step
         # utils.printGameState(gameWorld)
-        display.update()
-        time.sleep(0.1)
+        if not config.headless:
+            display.update()
+            time.sleep(0.1)
+
+    if recorder:
+        recorder.close(gameWorld)
 
     # Display message at end
     #if gameWorld.status == utils.State.WON:
@@ -58,10 +83,13 @@ def main():
     calc_time.sort()
     shortest = round(calc_time[0]*1000,2)
     average = round(statistics.mean(calc_time)*1000,2)
-    print(f"longest time: {longest}ms shortest time: {shortest}ms average time: {average}ms")
+    events.info("longest time: %sms shortest time: %sms average time: %sms", longest, shortest, average)
 
     # Close the display --- neded if we are going to have multiple runs.
-    display.close()
+    if not config.headless:
+        display.close()
+
+    return gameWorld.status
 
 # Since we explicitly named the main function
 if __name__ == "__main__":
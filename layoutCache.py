@@ -0,0 +1,135 @@
+# layoutCache.py
+#
+# Keeping what Link works out about a layout on disk, so that repeat
+# runs of the same layout don't work it out again.
+#
+# Evaluation runs the same seeded layouts over and over. Much of what
+# Link computes depends only on the layout --- distance tables, tours,
+# MDP policies --- and is the same every time. Each of these is kept
+# in the cache directory as one file, under a name made from a hash of
+# the layout (see layoutKey) and a description of what it is, such as
+# which gold a distance table is for.
+#
+# A file is a 16 byte header followed by the values as a flat array
+# of one type (an array module typecode), little-endian:
+#
+#   magic    4 bytes  b'WLC1'
+#   typecode 1 byte   the array typecode, as an ASCII character
+#   padding  3 bytes
+#   count    uint64   the number of values
+#
+# so it can be memory-mapped and used where it is, without reading it
+# in. Files are written to a temporary name and then renamed, so
+# processes sharing a cache (wumpus.py -j) never see half a file.
+#
+# The cache is kept below a size limit by deleting the files that
+# were used longest ago. Using a file sets its modification time, so
+# that is what "used longest ago" goes by.
+
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+MAGIC = b'WLC1'
+HEADER = struct.Struct('<4sc3xQ')
+
+# A hash of the parts of world's layout that never change: the size
+# of the grid, the pits and the gold Link starts with. Gold is
+# looted, so make the key when the game starts.
+def layoutKey(world):
+    digest = hashlib.sha256()
+    digest.update(struct.pack('<II', world.width, world.height))
+    for cells in (world.pLoc, world.gLoc):
+        cells = sorted([world.cellOf(loc) for loc in cells])
+        digest.update(struct.pack('<I', len(cells)))
+        digest.update(struct.pack('<%dI' % len(cells), *cells))
+    return digest.hexdigest()
+
+class LayoutCache():
+
+    # A cache in directory for the layout with the given key, holding
+    # at most maxBytes in all (counting every layout's files).
+    def __init__(self, directory, key, maxBytes):
+        self.directory = directory
+        self.key = key
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+
+    # The file for what name describes. name is a tuple of anything
+    # with a repr that stays the same from run to run (numbers,
+    # strings, and tuples of them).
+    def path(self, name):
+        digest = hashlib.sha256((self.key + repr(name)).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:40] + '.wlc')
+
+    # The values stored for name, as a sequence of the given typecode
+    # that reads straight from the file, or None if they aren't in
+    # the cache.
+    def load(self, name, typecode):
+        path = self.path(name)
+        try:
+            with open(path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                if size < HEADER.size:
+                    return None
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path) # used just now
+        except OSError:
+            return None
+        magic, code, count = HEADER.unpack_from(data)
+        itemSize = array.array(typecode).itemsize
+        if (magic != MAGIC or code.decode() != typecode
+            or size != HEADER.size + count * itemSize):
+            return None
+        if sys.byteorder != 'little':
+            values = array.array(typecode, data[HEADER.size:])
+            values.byteswap()
+            return values
+        return memoryview(data)[HEADER.size:].cast(typecode)
+
+    # Store values (numbers that fit the typecode) under name, and
+    # make room for them if the cache is full.
+    def store(self, name, typecode, values):
+        values = array.array(typecode, values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, typecode.encode(), len(values)))
+                file.write(values.tobytes())
+            os.replace(temporary, self.path(name))
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    # Delete the files used longest ago until the cache fits in
+    # maxBytes.
+    def evict(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.wlc'):
+                try:
+                    stat = entry.stat()
+                except OSError: # deleted by another process
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+                total += stat.st_size
+        files.sort()
+        for used, path, size in files:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError: # in use, or already gone
+                continue
+            total -= size
@@ -1,15 +1,47 @@
-import random
 from utils import Directions, Pose
-from collections import deque
-import heapq
-import math
+from world import PIT, WUMPUS
+from dstarLite import DStarLite
+import belief
+import config
+import layoutCache
+import rollout
+import search
+import spaceTime
+import tour
 import time
+
 class Link():
 
     def __init__(self, dungeon):
         self.gameWorld = dungeon
         self.moves = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
         self.visited = set()
+        self.fields = {} # (gold cell, allow_windy) -> DistanceField, kept between turns
+        self.danger = set() # squares made unsafe by the wumpus when the fields were last checked
+        self.legs = {} # (gold cell, gold cell, allow_windy) -> (DistanceField, cost), for the tour
+        self.tours = {} # allow_windy -> gold cells in the order Link plans to visit them
+        self.tour_stale = {} # allow_windy -> True if a leg changed before the tour could be planned again
+        self.straight = None # gold cells in the order of the straight-line tour, see straight_tour
+        self.planners = {} # allow_windy -> DStarLite, when config.planner is "dstar"
+        self.static_fields = {} # (gold cell, allow_windy) -> DistanceField ignoring the wumpus
+        self.plans = {} # allow_windy -> (cell Link should be in, gold cell, moves left), when config.planner is "spacetime"
+        self.deadline = None # when the planners have to stop this turn, see makeMove
+        self.risk = None # RiskField, when config.planner is "risk"
+        self.mdp = None # MdpPolicy, when config.planner is "mdp"
+        self.belief = None # Belief, when config.partialVisibility is set
+        self.heading = Directions.NORTH # the way Link last moved, which is the way they are looking
+        self.layout_cache = None # LayoutCache for this layout, if config.layoutCache is set
+        if config.layoutCache:
+            self.layout_cache = layoutCache.LayoutCache(config.layoutCache, layoutCache.layoutKey(dungeon),
+                                                        config.layoutCacheSize)
+        if config.planner == "mdp": # set up before the first move, which may have a deadline
+            import mdp # needs NumPy, so only imported when used
+            self.mdp = mdp.MdpPolicy(dungeon, self.layout_cache)
+        if config.planner == "risk": # set up before the first move, which may have a deadline
+            import riskField # needs NumPy, so only imported when used
+            self.risk = riskField.RiskField(dungeon)
+        if config.planner in ("jps", "risk"): # plan the tour before the first move, as it can take a while
+            self.straight_tour(dungeon.cellOf(dungeon.lLoc))
 
     def checkvalid(self, pos, allow_windy=False):
         """
@@ -26,14 +58,48 @@ class Link():
         if not allow_windy and self.gameWorld.isWindy(pos):  # Windy tiles indicate proximity to a pit
             #print(f"Avoiding Windy tile at ({pos.x}, {pos.y})")
             return False
-        if any(pos.x == wumpus.x and pos.y == wumpus.y for wumpus in self.gameWorld.getWumpusLocation()): # Tile checked if it contains wumpus
+        if self.gameWorld.isWumpus(pos): # Tile checked if it contains wumpus
             #print(f"Avoiding Wumpus at ({pos.x}, {pos.y})")
             return False
-        if any(pos.x == pit.x and pos.y == pit.y for pit in self.gameWorld.getPitsLocation()): # Tile checked if it contains pit
+        if self.gameWorld.isPit(pos): # Tile checked if it contains pit
             #print(f"Avoiding Pit at ({pos.x}, {pos.y})")
             return False
         return True
 
+    def checkvalidCell(self, cell, allow_windy=False):
+        """
+        Cell id version of checkvalid, used inside the searches.
+
+        :param cell: Cell id of the square to check (must be inside the world).
+        :param allow_windy: If True, allows movement into windy squares.
+        :return: True if the square is safe, False otherwise.
+        """
+        world = self.gameWorld
+        if world.stench[cell]: # smelly
+            return False
+        if not allow_windy and world.breeze[cell]: # windy
+            return False
+        if world.occupancy[cell] & (WUMPUS | PIT): # wumpus or pit in the square
+            return False
+        return True
+
+    def passable(self, allow_windy=False):
+        """
+        The test the searches use to decide which squares Link can move into. It is
+        checkvalidCell, but reads the world's layers directly, as the searches make
+        it for nearly every square they look at (jump point search most of all).
+
+        :param allow_windy: If True, allows movement into windy squares.
+        :return: A function from a cell id to True if the square is safe.
+        """
+        world = self.gameWorld
+        stench = world.stench # the layers are changed in place, so these stay current
+        breeze = world.breeze
+        occupancy = world.occupancy
+        if allow_windy:
+            return lambda cell: not stench[cell] and not occupancy[cell] & (WUMPUS | PIT)
+        return lambda cell: not stench[cell] and not breeze[cell] and not occupancy[cell] & (WUMPUS | PIT)
+
     def bfs_search(self, start, goal, allow_windy=False):
         """
         Finds the shortest path from start to goal while avoiding dangers using Breadth-First Search.
@@ -43,31 +109,9 @@ class Link():
         :param allow_windy: If True, allows Link to move through windy tiles.
         :return: A list of moves representing the shortest safe path, or an empty list if no path is found.
         """
-        queue = deque([(start, [])]) # create queue (position,path-to-reach)
-        visited = set()
-        
-        while queue:
-            (current, path) = queue.popleft()
-            if (current.x, current.y) in visited:
-                continue
-            
-            visited.add((current.x, current.y))
-            
-            if current.x == goal.x and current.y == goal.y:
-                return path # valid path to gold found
-            
-            for move in self.moves:
-                new_pos = self.getNewPosition(current, move)
-                
-                if (0 <= new_pos.x <= self.gameWorld.maxX and
-                    0 <= new_pos.y <= self.gameWorld.maxY and
-                    self.checkvalid(new_pos, allow_windy) and
-                    (new_pos.x, new_pos.y) not in visited):
-
-                    # if move results in valid and safe position not already added
-                    queue.append((new_pos, path + [move])) # add position and path to queue
-        
-        return []  # No valid path found
+        world = self.gameWorld
+        return search.bfs(world.successors, world.cellOf(start), world.cellOf(goal),
+                          self.passable(allow_windy))
     
     def dfs_search(self, start, goal, allow_windy=False):
         """
@@ -78,71 +122,519 @@ class Link():
         :param allow_windy: If True, allows Link to move through windy tiles.
         :return: A list of moves representing the shortest safe path, or an empty list if no path is found.
         """
-        stack = deque([(start, [])]) # create queue (position,path-to-reach)
-        visited = set()
-        
-        while stack:
-            (current, path) = stack.pop()
-            if (current.x, current.y) in visited:
-                continue
-            
-            visited.add((current.x, current.y))
-            
-            if current.x == goal.x and current.y == goal.y:
-                return path # valid path to gold found
-            
-            for move in self.moves:
-                new_pos = self.getNewPosition(current, move)
-                
-                if (0 <= new_pos.x <= self.gameWorld.maxX and
-                    0 <= new_pos.y <= self.gameWorld.maxY and
-                    self.checkvalid(new_pos, allow_windy) and
-                    (new_pos.x, new_pos.y) not in visited):
-
-                    # if move results in valid and safe position not already added
-                    stack.append((new_pos, path + [move])) # add position and path to queue
-        
-        return []  # No valid path found
+        world = self.gameWorld
+        return search.dfs(world.successors, world.cellOf(start), world.cellOf(goal),
+                          self.passable(allow_windy))
 
-    def makeMove(self):
+    def makeMove(self, deadline=None):
         """
         Determines Link's next move based on a dynamic decision-making process.
         Prioritizes escaping danger, then finding the safest path to gold.
+
+        With a deadline, the planners get the first half of the time left. If they
+        run out, what they have done so far is kept for the next turn, and the move
+        comes from anytime weighted A* towards the gold, which returns the best path
+        it has found when the deadline comes. If that finds nothing either, Link
+        makes a safe random move.
         
+        :param deadline: The time.time() by which the move is needed, or None for no limit.
         :return: The next move direction.
         """
         myPosition = self.gameWorld.getLinkLocation()
         allGold = self.gameWorld.getGoldLocation()
 
-        # determine closest gold via euclidian distance difference
-        nextGold = allGold[0]  
-        for gold in allGold:
-            if (abs(myPosition.x-nextGold.x) + abs(myPosition.y-nextGold.y)) > (abs(gold.x-nextGold.x) + abs(gold.y-nextGold.y)):
-                nextGold = gold
+        # if Link can only see part of the world, all they have to go on is what they believe
+        if config.partialVisibility:
+            self.heading = self.belief_move(myPosition)
+            return self.heading
 
-        #print(f"Finding safe path from {myPosition.x},{myPosition.y} to gold at {nextGold.x},{nextGold.y}")
-        
-        path = self.greedy_search(myPosition, nextGold, allow_windy=False) # initial path to avoid windy squares
-        
-        if not path:
-            #print("No fully safe path found, allowing windy tiles...")
-            path = self.greedy_search(myPosition, nextGold, allow_windy=True) # if no safe path try again allowing windy tiles
-        
-        if path:
-            #print(f"Path found: {path}") # follow move of path
-            next_move = path[0]
-            return next_move
+        if deadline is not None:
+            self.deadline = (time.time() + deadline) / 2 # halfway between now and the deadline
+        try:
+            # choose by simulating the futures that follow each move
+            if config.planner == "rollout":
+                return rollout.chooseMove(self.gameWorld, self.moves, self.deadline)
+
+            # look the move up in a policy that allows for Link's moves slipping
+            if config.planner == "mdp":
+                return self.moves[self.mdp.bestMove(self.deadline)]
+
+            # follow the planned tour of the gold using the distance field rooted at
+            # each gold (avoiding where the wumpus will be if planning in space-time),
+            # or head for the nearest gold using the D* Lite planner, or the risk costs,
+            # or along a straight-line tour with jump point search
+            if config.planner == "risk": # one search over the risk costs does the work of both passes
+                next_move = self.risk_move(myPosition)
+                if next_move is not None:
+                    return next_move
+            else:
+                changed = self.danger_changes()
+                if config.planner == "dstar":
+                    self.update_planners(changed)
+                else:
+                    self.update_fields(changed)
+                for allow_windy in (False, True): # if no fully safe path try again allowing windy tiles
+                    if config.planner == "dstar":
+                        next_move = self.dstar_move(myPosition, allow_windy)
+                    elif config.planner == "jps":
+                        next_move = self.jump_move(myPosition, allow_windy)
+                    elif config.planner == "spacetime":
+                        next_move = self.spacetime_move(myPosition, allow_windy)
+                        if next_move is None: # every path runs into a wumpus within the horizon
+                            next_move = self.tour_move(myPosition, allow_windy)
+                    else:
+                        next_move = self.tour_move(myPosition, allow_windy)
+                    if next_move is not None:
+                        return next_move
+        except search.OutOfTime:
+            next_move = self.anytime_move(myPosition, deadline)
+            if next_move is not None:
+                return next_move
+        finally:
+            self.deadline = None
         
         # If no clear path is found, make a safe random move
         safe_moves = [move for move in self.moves if self.checkvalid(self.getNewPosition(myPosition, move), allow_windy=True)]
         if not safe_moves:
             #print("No safe moves found, making a random move.")
-            return random.choice(self.moves) # completely random move
+            return self.gameWorld.rng.choice(self.moves) # completely random move
         
-        chosen_move = random.choice(safe_moves) # random move from safe squares
+        chosen_move = self.gameWorld.rng.choice(safe_moves) # random move from safe squares
         #print(f"No path found, moving {chosen_move}")
         return chosen_move
     
+    def wumpus_danger(self):
+        """
+        Finds the squares the wumpus make unsafe: the squares they are in and the
+        smelly squares around them. Pits and windy squares never change, so these
+        are the only squares whose safety can change during a game.
+
+        :return: A set of cell ids.
+        """
+        world = self.gameWorld
+        successors = world.successors
+        danger = set()
+        for loc in world.wLoc:
+            cell = world.cellOf(loc)
+            danger.add(cell)
+            for move, next_cell in successors[cell]:
+                danger.add(next_cell)
+        return danger
+
+    def danger_changes(self):
+        """
+        Finds the squares that have become safe or unsafe since the last call.
+
+        :return: A set of cell ids.
+        """
+        danger = self.wumpus_danger()
+        changed = danger ^ self.danger
+        self.danger = danger
+        return changed
+
+    def update_fields(self, changed):
+        """
+        Drops the cached distance fields that are no longer any use: those for gold
+        that has been looted, and those the wumpus have moved into or out of.
+
+        :param changed: Cell ids of the squares that have become safe or unsafe.
+        """
+        world = self.gameWorld
+        gold = {world.cellOf(loc) for loc in world.gLoc}
+        for key in list(self.fields):
+            if key[0] not in gold or (changed and self.fields[key].touches(changed)):
+                del self.fields[key]
+
+    def field(self, goal_cell, allow_windy=False):
+        """
+        Gets the distance field rooted at a gold, making it if it isn't cached.
+
+        :param goal_cell: Cell id of the gold.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The DistanceField.
+        """
+        key = (goal_cell, allow_windy)
+        field = self.fields.get(key)
+        if field is None:
+            if self.static_name() is not None: # the wumpus never move, so the field never changes
+                field = self.stored_field(("field", goal_cell, allow_windy) + self.static_name(),
+                                          goal_cell, self.passable(allow_windy))
+            else:
+                field = search.DistanceField(self.gameWorld.successors, goal_cell, self.passable(allow_windy))
+            self.fields[key] = field
+        return field
+
+    def static_name(self):
+        """
+        Whether what Link works out about the layout can go in the layout cache,
+        which it can if there is one and the wumpus never move, and if so, the part
+        of a cache name that says where the wumpus are.
+
+        :return: A tuple of the wumpus cells, or None.
+        """
+        if self.layout_cache is None or config.dynamic:
+            return None
+        return self.gameWorld.wumpusCells()
+
+    def stored_field(self, name, goal_cell, passable):
+        """
+        Gets a complete distance field from the layout cache, or if it isn't there,
+        works it out in full and stores it.
+
+        :param name: What the field is called in the cache.
+        :param goal_cell: Cell id of the gold.
+        :param passable: Function from a cell id to True if the square can be entered.
+        :return: The DistanceField.
+        """
+        successors = self.gameWorld.successors
+        table = self.layout_cache.load(name, 'i')
+        if table is not None:
+            return search.DistanceField.fromTable(successors, goal_cell, passable, table)
+        field = search.DistanceField(successors, goal_cell, passable)
+        self.layout_cache.store(name, 'i', field.complete())
+        return field
+
+    def field_move(self, start, goal, allow_windy=False):
+        """
+        Finds the first move of a shortest safe path from start to goal by following
+        the distance field rooted at goal downhill.
+
+        :param start: Starting position of Link.
+        :param goal: Target position (gold location).
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The move and the length of the path, or (None, -1) if there is no safe path.
+        """
+        world = self.gameWorld
+        field = self.field(world.cellOf(goal), allow_windy)
+
+        best_move = None
+        best = -1
+        for move, next_cell in world.successors[world.cellOf(start)]:
+            d = field.distance(next_cell, self.deadline)
+            if d >= 0 and (best_move is None or d < best):
+                best_move = move
+                best = d
+        return best_move, best + 1 if best_move is not None else -1
+
+    def tour_move(self, start, allow_windy=False):
+        """
+        Finds the first move towards the next gold on the tour that can be reached
+        safely, using the distance fields.
+
+        :param start: Starting position of Link.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The move, or None if no gold can be reached safely.
+        """
+        for gold_cell in self.plan_tour(start, allow_windy): # skip gold that can't be reached just now
+            next_move = self.field_move(start, self.gameWorld.poseOf(gold_cell), allow_windy)[0]
+            if next_move is not None:
+                return next_move
+        return None
+
+    def leg_cost(self, start_cell, goal_cell, allow_windy=False):
+        """
+        Length of the shortest safe path between two squares, read off the distance
+        field. The start square doesn't have to be safe itself.
+
+        :param start_cell: Cell id to start from.
+        :param goal_cell: Cell id of the gold to get to.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The length of the path, or -1 if there is no safe path.
+        """
+        field = self.field(goal_cell, allow_windy)
+        best = -1
+        for move, next_cell in self.gameWorld.successors[start_cell]:
+            d = field.distance(next_cell, self.deadline)
+            if d >= 0 and (best < 0 or d + 1 < best):
+                best = d + 1
+        return best
+
+    def gold_leg(self, start_cell, goal_cell, allow_windy=False):
+        """
+        Memoized leg_cost between two gold. A leg is only worked out again when the
+        distance field it was read from has been dropped.
+
+        :param start_cell: Cell id of the gold to start from.
+        :param goal_cell: Cell id of the gold to get to.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The length of the path (-1 if there is none), and True if it has
+                 changed since it was last asked for.
+        """
+        key = (start_cell, goal_cell, allow_windy)
+        field = self.field(goal_cell, allow_windy)
+        memo = self.legs.get(key)
+        if memo is not None and memo[0] is field: # still good
+            return memo[1], False
+        cost = self.leg_cost(start_cell, goal_cell, allow_windy)
+        self.legs[key] = (field, cost)
+        return cost, memo is None or memo[1] != cost
+
+    def plan_tour(self, start, allow_windy=False):
+        """
+        Gets the order in which to visit the gold that is left. The order is only
+        planned again when a leg of the tour has changed, or when there is no tour
+        yet. A change is remembered until the tour has been planned again, even if
+        time runs out first.
+
+        :param start: Position of Link.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: A list of gold cell ids.
+        """
+        world = self.gameWorld
+        gold = [world.cellOf(loc) for loc in world.gLoc]
+        left = set(gold)
+        visits = [cell for cell in self.tours.get(allow_windy, []) if cell in left] # looted gold drops out
+        replan = len(visits) != len(gold) or self.tour_stale.get(allow_windy, False)
+        for a, b in zip(visits, visits[1:]):
+            if self.gold_leg(a, b, allow_windy)[1]:
+                self.tour_stale[allow_windy] = True # kept in case time runs out before the tour is planned
+                replan = True
+
+        stored = None
+        if replan and self.static_name() is not None: # the same layout may have been toured before
+            name = ("tour", world.cellOf(start), tuple(gold), allow_windy) + self.static_name()
+            stored = self.layout_cache.load(name, 'i')
+            if stored is not None:
+                visits = list(stored)
+        if replan and stored is None:
+            # gold Link can't get to just now goes at the end, unplanned
+            start_cell = world.cellOf(start)
+            from_link = [self.leg_cost(start_cell, cell, allow_windy) for cell in gold]
+            reachable = [cell for cell, cost in zip(gold, from_link) if cost >= 0]
+            from_link = [cost for cost in from_link if cost >= 0]
+            unreachable = world.width * world.height # longer than any path, so these legs come last
+            between = []
+            for a in reachable:
+                costs = [0 if a == b else self.gold_leg(a, b, allow_windy)[0] for b in reachable]
+                between.append([cost if cost >= 0 else unreachable for cost in costs])
+            visits = [reachable[i] for i in tour.planTour(from_link, between)]
+            visits += [cell for cell in gold if cell not in visits]
+            if self.static_name() is not None:
+                self.layout_cache.store(name, 'i', visits)
+        if replan:
+            for key in [key for key in self.legs if key[0] not in left or key[1] not in left]:
+                del self.legs[key]
+        self.tours[allow_windy] = visits
+        self.tour_stale[allow_windy] = False
+        return visits
+
+    def update_planners(self, changed):
+        """
+        Brings the D* Lite planners up to date with where Link is, the gold that
+        has been looted and the squares that have become safe or unsafe.
+
+        :param changed: Cell ids of the squares that have become safe or unsafe.
+        """
+        world = self.gameWorld
+        gold = {world.cellOf(loc) for loc in world.gLoc}
+        for planner in self.planners.values():
+            planner.moveStart(world.cellOf(world.lLoc))
+            for cell in planner.goals - gold: # looted
+                planner.removeGoal(cell)
+            if changed:
+                planner.changeCells(changed)
+
+    def dstar_move(self, start, allow_windy=False):
+        """
+        Finds the first move of a shortest safe path from start to the nearest gold
+        using D* Lite, which keeps its search from one turn to the next.
+
+        :param start: Starting position of Link.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The move, or None if no gold can be reached safely.
+        """
+        world = self.gameWorld
+        planner = self.planners.get(allow_windy)
+        if planner is None: # the windy planner is only made if it is needed
+            planner = DStarLite(world.successors, world.width, world.cellOf(start),
+                                [world.cellOf(loc) for loc in world.gLoc],
+                                self.passable(allow_windy))
+            self.planners[allow_windy] = planner
+        return planner.nextMove(self.deadline)[0]
+
+    def static_passable(self, allow_windy=False):
+        """
+        Like passable, but ignoring the wumpus, which the space-time planner deals
+        with itself.
+
+        :param allow_windy: If True, allows movement into windy squares.
+        :return: A function from a cell id to True if the square is safe.
+        """
+        world = self.gameWorld
+        return lambda cell: not (world.occupancy[cell] & PIT or (not allow_windy and world.breeze[cell]))
+
+    def spacetime_move(self, start, allow_windy=False):
+        """
+        Finds the next move of a path towards the next gold on the tour that keeps
+        out of the way of where the wumpus may be by the time Link gets there. The
+        path is kept between turns, and only planned again when Link isn't where it
+        expected to be, the path has run out, or it is no longer safe.
+
+        :param start: Starting position of Link.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The move, or None if there is no safe path.
+        """
+        world = self.gameWorld
+        successors = world.successors
+        start_cell = world.cellOf(start)
+        forecast = spaceTime.WumpusForecast(world, config.spaceTimeHorizon, config.spaceTimeRisk)
+        gold = {world.cellOf(loc) for loc in world.gLoc}
+
+        kept = self.plans.pop(allow_windy, None)
+        if (kept and kept[0] == start_cell and kept[1] in gold and kept[2] and
+            forecast.safe(successors, start_cell, kept[2])):
+            goal_cell, moves = kept[1], kept[2]
+        else:
+            moves = []
+            for goal_cell in self.plan_tour(start, allow_windy): # skip gold that can't be reached just now
+                key = (goal_cell, allow_windy)
+                field = self.static_fields.get(key)
+                if field is None:
+                    if self.layout_cache is not None: # these ignore the wumpus, so depend only on the layout
+                        field = self.stored_field(("static", goal_cell, allow_windy), goal_cell,
+                                                  self.static_passable(allow_windy))
+                    else:
+                        field = search.DistanceField(successors, goal_cell, self.static_passable(allow_windy))
+                    self.static_fields[key] = field
+                moves = spaceTime.plan(successors, start_cell, goal_cell, self.static_passable(allow_windy),
+                                       lambda cell: field.distance(cell, self.deadline), forecast,
+                                       config.spaceTimeHorizon)
+                if moves:
+                    break
+            if not moves:
+                return None
+
+        next_cell = dict(successors[start_cell])[moves[0]]
+        self.plans[allow_windy] = (next_cell, goal_cell, moves[1:])
+        return moves[0]
+
+    def risk_move(self, start):
+        """
+        Finds the first move of the cheapest path to a gold over the risk cost grid,
+        which keeps out of windy squares unless there is no other way. The gold are
+        tried in the order of a tour planned on straight-line (Manhattan) distances,
+        so usually only one search is needed.
+
+        :param start: Starting position of Link.
+        :return: The move, or None if no gold can be reached safely.
+        """
+        world = self.gameWorld
+        costs = self.risk.costs()
+        if self.deadline is not None and time.time() > self.deadline:
+            raise search.OutOfTime()
+        start_cell = world.cellOf(start)
+        for gold_cell in self.straight_tour(start_cell):
+            path, cost = search.bestFirst(world.successors, start_cell, gold_cell,
+                                          lambda cell: costs[cell] != search.INFINITY,
+                                          lambda from_cell, to_cell: costs[to_cell],
+                                          search.manhattan(world.width, gold_cell), deadline=self.deadline)
+            if path:
+                return path[0]
+        return None
+
+    def jump_move(self, start, allow_windy=False):
+        """
+        Finds the first move of a shortest safe path to a gold with jump point search,
+        which on open maps expands far fewer squares than A*. The gold are tried in
+        the order of a tour planned on straight-line (Manhattan) distances.
+
+        :param start: Starting position of Link.
+        :param allow_windy: If True, allows Link to move through windy tiles.
+        :return: The move, or None if no gold can be reached safely.
+        """
+        world = self.gameWorld
+        start_cell = world.cellOf(start)
+        for gold_cell in self.straight_tour(start_cell):
+            path, cost = search.jumpPoint(world.width, world.height, start_cell, gold_cell,
+                                          self.passable(allow_windy), self.deadline)
+            if path:
+                return path[0]
+        return None
+
+    def straight_tour(self, start_cell):
+        """
+        Orders the gold that is left into a tour planned on straight-line (Manhattan)
+        distances, which take no searching to work out. The distances between the
+        gold never change, so the tour is only planned once, and looted gold drops
+        out of it.
+
+        :param start_cell: Cell id the tour starts from.
+        :return: A list of gold cell ids.
+        """
+        world = self.gameWorld
+        gold = [world.cellOf(loc) for loc in world.gLoc]
+        if self.straight is not None:
+            left = set(gold)
+            self.straight = [cell for cell in self.straight if cell in left] # looted gold drops out
+            if len(self.straight) == len(gold):
+                return self.straight
+        if self.deadline is not None and time.time() > self.deadline:
+            raise search.OutOfTime()
+        width = world.width
+        apart = lambda a, b: abs(a % width - b % width) + abs(a // width - b // width)
+        order = tour.planTour([apart(start_cell, cell) for cell in gold],
+                              [[apart(a, b) for b in gold] for a in gold])
+        self.straight = [gold[i] for i in order]
+        return self.straight
+
+    def belief_move(self, start):
+        """
+        Chooses a move using only what Link can perceive, for partial visibility.
+        Link heads for the nearest gold they have seen, or failing that the nearest
+        safe square next to where gold could be, through squares they know are free
+        of pits and away from the wumpus they have noticed.
+
+        :param start: Position of Link.
+        :return: The next move direction.
+        """
+        world = self.gameWorld
+        start_cell = world.cellOf(start)
+        if self.belief is None:
+            self.belief = belief.Belief(world.width, world.height, world.successors, start_cell)
+        known = self.belief
+        known.update(world.observe(self.heading), config.dynamic, config.senseDistance)
+
+        safe = known.safe()
+        passable = known.testable(safe)
+        for targets in known.targets(): # gold first, then places to find out more
+            path = search.bfsNearest(world.successors, start_cell, known.testable(targets), passable)
+            if path:
+                return path[0]
+
+        # nowhere to head for just now, so make a safe random move, or failing that a
+        # move to a square with no pit and no wumpus Link knows of
+        for allowed in (safe, known.pitFree & ~known.tracked):
+            moves = [move for move, cell in world.successors[start_cell] if allowed >> cell & 1]
+            if moves:
+                return world.rng.choice(moves)
+        return world.rng.choice(self.moves)
+
+    def anytime_move(self, start, deadline):
+        """
+        Finds the first move of the best safe path to a gold that anytime weighted A*
+        can find by the deadline, used when the planners run out of time. The gold
+        is the next one on the last tour planned, or failing that the nearest.
+
+        :param start: Starting position of Link.
+        :param deadline: The time.time() by which the move is needed.
+        :return: The move, or None if no path was found in time.
+        """
+        world = self.gameWorld
+        start_cell = world.cellOf(start)
+        gold = [world.cellOf(loc) for loc in world.gLoc]
+        for allow_windy in (False, True):
+            stop = deadline if allow_windy else (time.time() + deadline) / 2 # leave time to try windy tiles
+            targets = [cell for cell in self.tours.get(allow_windy, []) if cell in gold]
+            if not targets:
+                targets = sorted(gold, key=lambda cell: abs(cell % world.width - start.x) + abs(cell // world.width - start.y))
+            goal_cell = targets[0]
+            path, cost = search.anytimeAStar(world.successors, start_cell, goal_cell,
+                                             search.manhattan(world.width, goal_cell),
+                                             self.passable(allow_windy), deadline=stop)
+            if path:
+                return path[0]
+        return None
+
     def uniform_cost(self, start, goal,allow_windy=False):
         """
         Uses uniform cost to find a path from start to goal.
@@ -151,26 +643,9 @@ class Link():
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                if (0 <= new_pos.x <= self.gameWorld.maxX and 0 <= new_pos.y <= self.gameWorld.maxY and (new_pos.x, new_pos.y) not in visited and self.checkvalid(new_pos, allow_windy)): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
-
-        else:
-            return []
+        world = self.gameWorld
+        return search.uniformCost(world.successors, world.cellOf(start), world.cellOf(goal),
+                                  self.passable(allow_windy))
         
     def greedy_search(self, start, goal,allow_windy=False):
         """
@@ -180,27 +655,11 @@ class Link():
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                new_pos.cost = math.sqrt(abs(new_pos.x-goal.x)**2 + abs(new_pos.y-goal.y)**2) # euclidian to goal
-                if (0 <= new_pos.x <= self.gameWorld.maxX and 0 <= new_pos.y <= self.gameWorld.maxY and (new_pos.x, new_pos.y) not in visited and self.checkvalid(new_pos, allow_windy)): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
-
-        else:
-            return []
+        world = self.gameWorld
+        goal_cell = world.cellOf(goal)
+        return search.greedy(world.successors, world.cellOf(start), goal_cell,
+                             search.euclidean(world.width, goal_cell), # euclidian to goal
+                             self.passable(allow_windy))
 
     def A_star_search(self, start, goal,allow_windy=False):
         """
@@ -213,29 +672,12 @@ class Link():
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                # add euclidian cost
-                new_pos_euclidian = math.sqrt(abs(new_pos.x-goal.x)**2 + abs(new_pos.y-goal.y)**2) # euclidian to goal
-                new_pos.cost += new_pos_euclidian
-                if (0 <= new_pos.x <= self.gameWorld.maxX and 0 <= new_pos.y <= self.gameWorld.maxY and (new_pos.x, new_pos.y) not in visited and self.checkvalid(new_pos, allow_windy)): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
+        world = self.gameWorld
+        goal_cell = world.cellOf(goal)
+        return search.aStar(world.successors, world.cellOf(start), goal_cell,
+                            search.euclidean(world.width, goal_cell), # euclidian to goal
+                            self.passable(allow_windy))
 
-        else:
-            return []
     def getNewPosition(self, position, move):
         """
         Calculates the new position based on the current position and move direction.
@@ -244,9 +686,7 @@ class Link():
         :param move: The direction of movement.
         :return: The new position after moving.
         """
-        newPosition = Pose()
-        newPosition.x = position.x + (1 if move == Directions.EAST else -1 if move == Directions.WEST else 0)
-        newPosition.y = position.y + (1 if move == Directions.NORTH else -1 if move == Directions.SOUTH else 0)
+        x = position.x + (1 if move == Directions.EAST else -1 if move == Directions.WEST else 0)
+        y = position.y + (1 if move == Directions.NORTH else -1 if move == Directions.SOUTH else 0)
 
-        newPosition.cost = abs(newPosition.x-position.x) + abs(newPosition.y-position.y) + position.cost
-        return newPosition
\ No newline at end of file
+        return Pose(x, y, abs(x-position.x) + abs(y-position.y) + position.cost)
\ No newline at end of file
@@ -0,0 +1,165 @@
+# mdp.py
+#
+# A policy for Link that allows for their moves slipping.
+#
+# With config.nonDeterministic set, World.probabilisticMotion makes
+# Link go the way they chose with probability directionProbability,
+# and otherwise slip to one side or the other, each equally likely.
+# A shortest path that runs along the edge of a pit is then a gamble
+# every step. Here the layout is treated as a Markov decision process
+# and solved by value iteration:
+#
+# - every move costs STEP_COST;
+# - moving into a gold gets GOLD_VALUE and ends the process;
+# - moving into a pit or a Wumpus (and, if the Wumpus move, a smelly
+#   cell, since one could step out of it into Link) costs DEATH_COST
+#   and ends it.
+#
+# The transitions are held as NumPy arrays: for each direction, the
+# cell each cell leads to (the same cell if the move runs into the
+# edge), so one sweep of value iteration over the whole grid is a few
+# array operations. The solution is a policy, the best direction for
+# every cell, so choosing a move is a lookup.
+#
+# The gold and the danger only change when gold is looted or a Wumpus
+# moves, so policies are kept for each set of gold and danger that
+# has come up. With Wumpus that don't move (config.dynamic False)
+# there are only as many solves as there are gold. If they do move,
+# the policy is solved again each time they do, which works but is
+# much slower.
+#
+# Solving takes many sweeps on a large grid, so with a deadline the
+# clock is looked at after each sweep, and search.OutOfTime raised if
+# it has passed. The values so far are kept, and the next solve for
+# the same gold and danger goes on from them.
+#
+# If there is a layout cache (see layoutCache.py) and the Wumpus don't
+# move, policies are kept there too, so a layout that comes up again
+# is not solved again.
+#
+# Use it by setting planner = "mdp" in config.py. Needs NumPy, unlike
+# the rest of the game.
+
+import time
+import numpy as np
+import config
+import search
+from world import PIT, WUMPUS
+
+STEP_COST = 1
+GOLD_VALUE = 100
+DEATH_COST = 1000
+
+# Values are discounted by this much a step, so that they settle
+# even in parts of the grid from which no gold can be reached.
+DISCOUNT = 0.99
+
+# Value iteration stops when no value changes by more than this.
+TOLERANCE = 1e-6
+
+# For the directions in the order N, S, E, W (as in Link.moves), the
+# two directions at right angles, which are where a slip goes.
+SIDE_A = np.array([2, 2, 0, 0])
+SIDE_B = np.array([3, 3, 1, 1])
+
+class MdpPolicy():
+
+    # world is the game, and cache a LayoutCache for its layout, or
+    # None.
+    def __init__(self, world, cache=None):
+        self.world = world
+        self.cache = cache
+        width = world.width
+        cell = np.arange(width * world.height)
+        x = cell % width
+        y = cell // width
+        # after[d][cell] is where moving from cell in direction d
+        # leads, with d in the order N, S, E, W (as World.successors
+        # has them: north is up a row).
+        self.after = np.stack([np.where(y < world.height - 1, cell + width, cell),
+                               np.where(y > 0, cell - width, cell),
+                               np.where(x < width - 1, cell + 1, cell),
+                               np.where(x > 0, cell - 1, cell)])
+        self.policies = {} # gold cells -> policy, for the danger below
+        self.partial = {} # gold cells -> values of a solve that ran out of time
+        self.danger = None # (Wumpus cells, danger cells) the policies are for
+
+    # Solve for a policy with gold in the cells goals and danger in
+    # the cells deadly. Returns, for each cell, the index of the best
+    # direction in the order N, S, E, W. If deadline (a time.time()
+    # value) passes first, raises search.OutOfTime.
+    def solve(self, goals, deadly, deadline=None):
+        cells = self.after.shape[1]
+        straight = config.directionProbability if config.nonDeterministic else 1.0
+        side = (1.0 - straight) / 2
+
+        value = self.partial.pop(goals, None)
+        if value is None:
+            value = np.zeros(cells)
+            value[list(goals)] = GOLD_VALUE
+            value[list(deadly)] = -DEATH_COST
+        ends = np.zeros(cells, dtype=bool)
+        ends[list(goals)] = True
+        ends[list(deadly)] = True
+
+        for sweep in range(10 * cells):
+            ahead = value[self.after] # ahead[d][cell] is the value of where d leads
+            q = straight * ahead + side * (ahead[SIDE_A] + ahead[SIDE_B])
+            updated = np.where(ends, value, DISCOUNT * q.max(axis=0) - STEP_COST)
+            if np.abs(updated - value).max() < TOLERANCE:
+                value = updated
+                break
+            value = updated
+            if deadline is not None and time.time() > deadline:
+                self.partial[goals] = value # go on from here next time
+                raise search.OutOfTime()
+        ahead = value[self.after]
+        q = straight * ahead + side * (ahead[SIDE_A] + ahead[SIDE_B])
+        return q.argmax(axis=0)
+
+    # solve, reading the policy from the layout cache if it is there,
+    # and storing it if not. Only the Wumpus and pits can make a cell
+    # deadly, and the pits are part of the layout, so with Wumpus that
+    # don't move the danger is always the same for a layout.
+    def cachedSolve(self, goals, deadly, deadline=None):
+        if self.cache is None or config.dynamic:
+            return self.solve(goals, deadly, deadline)
+        straight = config.directionProbability if config.nonDeterministic else 1.0
+        name = ("mdp", tuple(sorted(goals)), self.danger[0], straight,
+                STEP_COST, GOLD_VALUE, DEATH_COST, DISCOUNT)
+        policy = self.cache.load(name, 'b')
+        if policy is None:
+            policy = self.solve(goals, deadly, deadline)
+            self.cache.store(name, 'b', policy.tolist())
+        return policy
+
+    # The cells Link must not go into: pits and Wumpus, and smelly
+    # cells if the Wumpus move.
+    def dangerCells(self):
+        world = self.world
+        deadly = set()
+        for cell, occupant in enumerate(world.occupancy):
+            if occupant & (PIT | WUMPUS):
+                deadly.add(cell)
+            elif config.dynamic and world.stench[cell]:
+                deadly.add(cell)
+        return frozenset(deadly)
+
+    # The index of the best direction for Link, in the order N, S, E,
+    # W. Raises search.OutOfTime if there is no policy yet and solving
+    # for one doesn't finish by deadline.
+    def bestMove(self, deadline=None):
+        world = self.world
+        # Pits never change, so the danger only changes if the Wumpus
+        # have moved.
+        wumpus = world.wumpusCells()
+        if self.danger is None or wumpus != self.danger[0]:
+            self.danger = (wumpus, self.dangerCells())
+            self.policies = {}
+            self.partial = {}
+        goals = frozenset([world.cellOf(loc) for loc in world.gLoc])
+        policy = self.policies.get(goals)
+        if policy is None:
+            policy = self.cachedSolve(goals, self.danger[1], deadline)
+            self.policies[goals] = policy
+        return int(policy[world.cellOf(world.lLoc)])
@@ -11,20 +11,28 @@
 # Last Modified: 17/12/24
 
 from puzzleWorld import PuzzleWorld
-from dungeon import Dungeon
+from recorder import TraceRecorder
 import random
 import config
+import events
 import utils
 import time
 
 # We explicitly define the main function to allow this to both be run
 # from the command line on its own, or invoked (from wumpus.py)
-def main():
-    # How we set the puzzle up. 
-    puzzle = PuzzleWorld()
-    endState = PuzzleWorld()
-    # Check if we want a display of the game state
+#
+# rng is the random number generator for this run (see
+# utils.makeRng). If it is None, the puzzle uses the random module. If
+# tracePath is given, every step is recorded there (see recorder.py).
+def main(rng=None, tracePath=None):
+    # How we set the puzzle up. Both worlds are laid out from the
+    # same stream, one after the other.
+    puzzle = PuzzleWorld(rng)
+    endState = PuzzleWorld(rng)
+    # Check if we want a display of the game state. The import is
+    # here so that headless runs never need a window system.
     if not config.headless:
+        from dungeon import Dungeon
         display = Dungeon(puzzle)
         # Creates a visualization of the end state
         show = Dungeon(endState)
@@ -41,26 +49,38 @@ def main():
         show.update()
         time.sleep(1)
 
+    # Record the run, if asked to
+    recorder = None
+    if tracePath:
+        recorder = TraceRecorder(tracePath, puzzle, endState)
+
     # Now run...
     start_time = time.time()
     while not(puzzle.isSolved(endState)):
+        step_time = time.time()
         puzzle.makeAMove(endState)
+        if recorder:
+            recorder.add(puzzle, time.time()-step_time)
         if not config.headless:
             display.update()
             time.sleep(1)
     end_time = time.time()
+    if recorder:
+        recorder.close(puzzle)
 
-    print("complete time: ",end_time-start_time,"s")
+    events.info("complete time:  %s s", end_time-start_time)
     # Display message at end
     if puzzle.status == utils.State.WON:
-        print("You succeeded!")
+        events.info("You succeeded!")
     else:
-        print("You failed!")
+        events.info("You failed!")
 
     # Close the display --- needed if we are going to have multiple runs.
     if not config.headless:
         display.close()
 
+    return puzzle.status
+
 # Since we explicitly named the main function
 if __name__ == "__main__":
     main()
@@ -0,0 +1,254 @@
+# puzzleSolver.py
+#
+# Solving the puzzle (see puzzle.py) with one search over where Link
+# and all the Wumpus are.
+#
+# A state of the puzzle is the cell of Link and the cell of each
+# Wumpus, and a move is one of them going one cell N, S, E or W. With
+# k Wumpus a state has up to 4(k + 1) successors --- 12 for the
+# default two Wumpus --- which is why breadth first search takes so
+# long (see README.md). The Wumpus are alike, so the puzzle is solved
+# when Link is in their goal cell and the Wumpus are in the goal
+# Wumpus cells, whichever Wumpus is in which.
+#
+# Here the search is A*. A state is packed into one int, with the
+# cells (numbered as in World.cellIndex) as the digits of a number in
+# base cells = width * height:
+#
+#   state = link + cells * (wumpus1 + cells * (wumpus2 + ...))
+#
+# where the Wumpus cells are in sorted order, as World.wumpusCells
+# gives them. Since the Wumpus are alike, states that only differ in
+# which Wumpus is where are one state, which makes the search up to k!
+# times smaller, and the goal is a single int to compare with. The
+# closed set and the parent links are dicts keyed by these ints.
+# Moving Link from cell a to cell b adds b - a; moving a Wumpus means
+# sorting the cells again. A plan still has to say which Wumpus moves,
+# so the search records the cell a Wumpus moved from, and the plan is
+# worked out from where each Wumpus really starts.
+#
+# The heuristic is the Manhattan distance from Link to their goal,
+# plus the least total Manhattan distance over the ways of sending
+# each Wumpus to a different goal Wumpus cell. A move changes one of
+# the distances by one, so this never overestimates, and plans have
+# the fewest moves. With nothing in the way it is the exact number of
+# moves left, so the search goes more or less straight to the goal;
+# pits, if there are any, are kept out of.
+#
+# JointSearch.meet finds plans just as short by breadth first search
+# from the start and the goal at once, which needs no heuristic.
+#
+# Use them by setting puzzleSolver = "astar" or "bidirectional" in
+# config.py.
+
+import heapq
+import itertools
+from utils import Directions
+from world import PIT
+
+# The move that undoes each move.
+OPPOSITE = {Directions.NORTH: Directions.SOUTH, Directions.SOUTH: Directions.NORTH,
+            Directions.EAST: Directions.WEST, Directions.WEST: Directions.EAST}
+
+# The least total cost of giving each row of costs a different
+# column, by dynamic programming over the sets of columns used, which
+# takes time proportional to 2^k * k for k rows.
+def assignment(costs):
+    k = len(costs)
+    full = (1 << k) - 1
+    best = [None] * (full + 1) # best[used] gives the first popcount(used) rows the columns in used
+    best[0] = 0
+    for used in range(full):
+        if best[used] is None:
+            continue
+        row = costs[bin(used).count('1')]
+        for column in range(k):
+            if not used >> column & 1:
+                total = best[used] + row[column]
+                after = used | 1 << column
+                if best[after] is None or total < best[after]:
+                    best[after] = total
+    return best[full]
+
+class JointSearch():
+
+    # For the puzzle in world (a PuzzleWorld). Link and the Wumpus
+    # move on world.successors and keep out of world's pits.
+    def __init__(self, world):
+        self.width = world.width
+        self.cells = world.width * world.height
+        self.successors = world.successors
+        self.open = [not occupant & PIT for occupant in world.occupancy]
+        self.things = 1 + len(world.wLoc)
+
+    # The state in which Link is in cell link and the Wumpus are in
+    # the cells wumpus, in any order.
+    def pack(self, link, wumpus):
+        state = 0
+        for cell in sorted(wumpus, reverse=True):
+            state = state * self.cells + cell
+        return state * self.cells + link
+
+    # The cells of Link and the Wumpus in state, as a list with Link's
+    # first and then the Wumpus in sorted order.
+    def unpack(self, state):
+        cells = []
+        for i in range(self.things):
+            state, cell = divmod(state, self.cells)
+            cells.append(cell)
+        return cells
+
+    # The Manhattan distance between two cells.
+    def apart(self, a, b):
+        width = self.width
+        return abs(a % width - b % width) + abs(a // width - b // width)
+
+    # The heuristic for a state whose cells (as unpack gives them)
+    # are where, with Link to go to linkGoal and the Wumpus to
+    # wumpusGoals.
+    def estimate(self, where, linkGoal, wumpusGoals):
+        h = self.apart(where[0], linkGoal)
+        if wumpusGoals:
+            h += assignment([[self.apart(cell, goal) for goal in wumpusGoals] for cell in where[1:]])
+        return h
+
+    # The states one move on from state, whose cells (as unpack gives
+    # them) are where, as (next state, moved, from cell, to cell,
+    # direction) with moved 0 for Link and 1 for a Wumpus. Wumpus in
+    # the same cell lead to the same states, so only one of them is
+    # moved.
+    def moves(self, state, where):
+        link = where[0]
+        for move, nextCell in self.successors[link]:
+            if self.open[nextCell]:
+                yield state + nextCell - link, 0, link, nextCell, move
+        wumpus = where[1:]
+        for i, cell in enumerate(wumpus):
+            if i > 0 and cell == wumpus[i - 1]:
+                continue
+            for move, nextCell in self.successors[cell]:
+                if self.open[nextCell]:
+                    wumpus[i] = nextCell
+                    yield self.pack(link, wumpus), 1, cell, nextCell, move
+                    wumpus[i] = cell
+
+    # A plan with the fewest moves from Link in cell link and the
+    # Wumpus in the cells wumpus, to Link in linkGoal and the Wumpus
+    # in the cells wumpusGoals (in any order). A plan is a list of
+    # moves in the form PuzzleWorld.takeStep takes, each moving one
+    # of them; it is empty if there is no plan, or nothing to do.
+    def solve(self, link, wumpus, linkGoal, wumpusGoals):
+        start = self.pack(link, wumpus)
+        goal = self.pack(linkGoal, wumpusGoals)
+        parent = {start: None} # state -> (state before, moved, from cell, direction)
+        g = {start: 0}
+        closed = set()
+        tie = itertools.count()
+        h = self.estimate(self.unpack(start), linkGoal, wumpusGoals)
+        # On equal priorities, states nearer the goal come first.
+        queue = [(h, h, next(tie), start, 0)]
+        while queue:
+            priority, h, _, state, gState = heapq.heappop(queue)
+            if state in closed:
+                continue
+            closed.add(state)
+            if state == goal:
+                return self.planFrom(wumpus, self.movesTo(parent, state))
+            gNext = gState + 1
+            for nextState, moved, cell, nextCell, move in self.moves(state, self.unpack(state)):
+                if nextState in closed or gNext >= g.get(nextState, gNext + 1):
+                    continue
+                g[nextState] = gNext
+                parent[nextState] = (state, moved, cell, move)
+                hNext = self.estimate(self.unpack(nextState), linkGoal, wumpusGoals)
+                heapq.heappush(queue, (gNext + hNext, hNext, next(tie), nextState, gNext))
+        return []
+
+    # A plan with the fewest moves, as solve finds, by breadth first
+    # search from both ends at once. The search that has the fewer
+    # states waiting goes on by one whole layer (all the states one
+    # move further from its end) at a time, until the two meet. If
+    # each has to go d moves to meet the other, each looks at about
+    # the number of states within d moves, rather than 2d as breadth
+    # first search from the start would. Every move can be undone (a
+    # move off the grid is not a move), so the search from the goal
+    # uses the same moves, and a move it makes is made the other way
+    # round in the plan.
+    def meet(self, link, wumpus, linkGoal, wumpusGoals):
+        start = self.pack(link, wumpus)
+        goal = self.pack(linkGoal, wumpusGoals)
+        # parents[0] is as for solve; in parents[1] a state maps to
+        # (state after, moved, from cell, direction) for the move on
+        # towards the goal.
+        parents = ({start: None}, {goal: None})
+        depths = ({start: 0}, {goal: 0})
+        layers = ([start], [goal])
+        best = (start, 0) if start == goal else None # where the searches meet, and the plan length
+        while best is None and layers[0] and layers[1]:
+            side = 0 if len(layers[0]) <= len(layers[1]) else 1
+            parent = parents[side]
+            depth = depths[side]
+            otherDepth = depths[1 - side]
+            after = []
+            for state in layers[side]:
+                nextDepth = depth[state] + 1
+                for nextState, moved, cell, nextCell, move in self.moves(state, self.unpack(state)):
+                    if nextState in parent:
+                        continue
+                    if side == 0:
+                        parent[nextState] = (state, moved, cell, move)
+                    else:
+                        parent[nextState] = (state, moved, nextCell, OPPOSITE[move])
+                    depth[nextState] = nextDepth
+                    after.append(nextState)
+                    if nextState in otherDepth:
+                        length = nextDepth + otherDepth[nextState]
+                        if best is None or length < best[1]:
+                            best = (nextState, length)
+            layers = (after, layers[1]) if side == 0 else (layers[0], after)
+        if best is None:
+            return []
+        moves = self.movesTo(parents[0], best[0])
+        state = best[0]
+        while parents[1][state] is not None:
+            state, moved, cell, move = parents[1][state]
+            moves.append((moved, cell, move))
+        return self.planFrom(wumpus, moves)
+
+    # Follow the parent links back to the start, and return the moves
+    # as (moved, from cell, direction), in the order they are made.
+    def movesTo(self, parent, state):
+        moves = []
+        while parent[state] is not None:
+            state, moved, cell, move = parent[state]
+            moves.append((moved, cell, move))
+        moves.reverse()
+        return moves
+
+    # Turn moves (as movesTo gives them) into a plan, for Wumpus that
+    # start in the cells wumpus, in order. A Wumpus move goes to a
+    # Wumpus in the cell it is from.
+    def planFrom(self, wumpus, moves):
+        wumpus = list(wumpus)
+        plan = []
+        for moved, cell, move in moves:
+            step = [0] * self.things
+            if moved == 0:
+                step[0] = move
+            else:
+                i = wumpus.index(cell)
+                step[i + 1] = move
+                wumpus[i] = dict(self.successors[cell])[move]
+            plan.append(step)
+        return plan
+
+# A plan with the fewest moves that takes world (a PuzzleWorld) to
+# goal, in the form PuzzleWorld.takeStep takes, found by A* or, if
+# bidirectional is True, by breadth first search from both ends.
+def solve(world, goal, bidirectional=False):
+    search = JointSearch(world)
+    ends = (world.cellOf(world.lLoc), [world.cellOf(loc) for loc in world.wLoc],
+            goal.cellOf(goal.lLoc), [goal.cellOf(loc) for loc in goal.wLoc])
+    if bidirectional:
+        return search.meet(*ends)
+    return search.solve(*ends)
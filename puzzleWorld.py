@@ -6,22 +6,35 @@
 # Written by: Simon Parsons
 # Last Modified: 17/12/24
 
+import config
 import utils
-from world import World
+import events
+import puzzleSolver
+from world import World, PIT
 from utils import Pose, Directions, State
-from collections import deque
-import heapq
-import math
+import search
 class PuzzleWorld(World):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None):
+        super().__init__(rng)
         self.pLoc = []
         self.gLoc = []
+        self.indexOccupants() # pits and gold were dropped, so re-index
         self.status = State.PLAY
         self.moves = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
         self.plan = []
     
+    def clone(self, rng=None):
+        """
+        Copies the world as World.clone does, along with the current plan.
+
+        :param rng: Optional random number generator for the copy to use
+        :return: A PuzzleWorld that can be changed without changing this one
+        """
+        twin = super().clone(rng)
+        twin.plan = list(self.plan) # the plan is popped as moves are made
+        return twin
+
     def isSolved(self, goal):
         """
         Checks if the current world state matches the goal state.
@@ -31,7 +44,7 @@ class PuzzleWorld(World):
         """
         if utils.sameAs(self, goal): # using sameAs check if puzzle state == goaalstate
             self.status = State.WON # chaange state to won
-            print("Puzzle Over!")
+            events.info("Puzzle Over!")
             return True # return true
         return False # return false
     
@@ -47,21 +60,29 @@ class PuzzleWorld(World):
         
         if self.plan: # if plan found
             move = self.plan.pop(0) # get and remove next moves from plan
-            print("Executing Move:", move)
+            if events.stepEvents: # only build the message if it will be shown
+                events.step("Executing Move: %s", move)
             self.takeStep(move) # move characters
         else:
-            print("No moves left to execute!")
+            events.warning("No moves left to execute!")
     
     def generatePlan(self, goal):
         """
         Generates a sequence of moves to transition from the current state to the goal state.
-        Uses BFS to determine the optimal path for Link and each Wumpus.
+        Uses greedy search to find the path for Link and each Wumpus, or jump point
+        search if there are pits in the way, and moves them all together. With
+        config.puzzleSolver set to "astar" or "bidirectional", searches over where
+        they all are instead and moves one at a time (see puzzleSolver.py).
         
         :param goal: The target state
         :return: A list of moves in the format [Link_move, Wumpus1_move, Wumpus2_move, ...]
         """
-        link_path = self.greedy_search(self.lLoc, goal.lLoc) # get links path
-        wumpus_paths = [self.greedy_search(self.wLoc[i], goal.wLoc[i]) for i in range(len(self.wLoc))] # get wumpus paths
+        if config.puzzleSolver in ("astar", "bidirectional"): # one search over Link and all the wumpus together
+            return puzzleSolver.solve(self, goal, config.puzzleSolver == "bidirectional")
+
+        find_path = self.jump_point_search if self.pLoc else self.greedy_search # greedy is only shortest with nothing in the way
+        link_path = find_path(self.lLoc, goal.lLoc) # get links path
+        wumpus_paths = [find_path(self.wLoc[i], goal.wLoc[i]) for i in range(len(self.wLoc))] # get wumpus paths
         
         max_length = max(len(link_path), max(len(path) for path in wumpus_paths)) # get length of longest path
         plan = []
@@ -83,25 +104,7 @@ class PuzzleWorld(World):
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = deque([(start, [])]) # init queue
-        visited = set() # init visited
-        
-        while queue: # while moves in queue
-            current, path = queue.popleft() # pop first item in queue
-            if (current.x, current.y) in visited: # skip if already in visited
-                continue
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current path is goal state
-                return path  # return path to square
-            
-            for move in self.moves: # for each direction
-                new_pos = self.getNewPosition(current, move) # get new square (if you were to do the move)
-                if (0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY and (new_pos.x, new_pos.y) not in visited): # if vaalid squaare that has not been visited
-                    queue.append((new_pos, path + [move])) # add to the end of the queue (cords , path from to to cords)
-        
-        return [] # return empty if no valid path
+        return search.bfs(self.successors, self.cellOf(start), self.cellOf(goal))
     
     def dfs_search(self, start, goal):
         """
@@ -111,25 +114,7 @@ class PuzzleWorld(World):
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        stack = [(start, [])] # init stack
-        visited = set() # init visited
-        
-        while stack: # while moves in stack
-            current, path = stack.pop(-1) # get last item in stack
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path # return path
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                if (0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY and (new_pos.x, new_pos.y) not in visited): # if valid and not visited
-                    stack.append((new_pos, path + [move])) # append to the stack
-        
-        return [] # if no path return empty array
+        return search.dfs(self.successors, self.cellOf(start), self.cellOf(goal))
     
 
     def uniform_cost(self, start, goal):
@@ -140,27 +125,11 @@ class PuzzleWorld(World):
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                current.print()
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                if (0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY and (new_pos.x, new_pos.y) not in visited): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
+        path, cost = search.bestFirst(self.successors, self.cellOf(start), self.cellOf(goal))
+        if cost != search.INFINITY and events.stepEvents:
+            events.step("Cost: %s [ %d , %d ]", start.cost + cost, goal.x, goal.y)
+        return path
 
-        else:
-            return []
     def greedy_search(self, start, goal):
         """
         Uses greedy search to find a path from start to goal.
@@ -169,27 +138,21 @@ class PuzzleWorld(World):
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                new_pos.cost = math.sqrt(abs(new_pos.x-goal.x)**2 + abs(new_pos.y-goal.y)**2) # euclidian to goal
-                if (0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY and (new_pos.x, new_pos.y) not in visited): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
+        goal_cell = self.cellOf(goal)
+        return search.greedy(self.successors, self.cellOf(start), goal_cell,
+                             search.euclidean(self.width, goal_cell)) # euclidian to goal
 
-        else:
-            return []
+    def jump_point_search(self, start, goal):
+        """
+        Uses jump point search to find a shortest path from start to goal around
+        the pits, expanding far fewer squares than A* on open grids.
+
+        :param start: The starting position
+        :param goal: The target position
+        :return: A list of directional moves to reach the goal
+        """
+        return search.jumpPoint(self.width, self.height, self.cellOf(start), self.cellOf(goal),
+                                lambda cell: not self.occupancy[cell] & PIT)[0]
 
     def A_star_search(self, start, goal):
         """
@@ -202,29 +165,10 @@ class PuzzleWorld(World):
         :param goal: The target position
         :return: A list of directional moves to reach the goal
         """
-        queue = [] # init stack
-        heapq.heappush(queue,(start, []))
-        visited = set() # init visited
-        while queue: # while moves in stack
-            (current,path) = heapq.heappop(queue) # get item
-            if (current.x, current.y) in visited: # if already visited
-                continue # skip
-            
-            visited.add((current.x, current.y)) # add to visited
-            
-            if current.x == goal.x and current.y == goal.y: # if current is goal
-                return path# append to complete paths array
-            
-            for move in self.moves: # for each move
-                new_pos = self.getNewPosition(current, move) # get possible new position
-                # add euclidian cost
-                new_pos_euclidian = math.sqrt(abs(new_pos.x-goal.x)**2 + abs(new_pos.y-goal.y)**2) # euclidian to goal
-                new_pos.cost += new_pos_euclidian
-                if (0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY and (new_pos.x, new_pos.y) not in visited): # if valid and not visited
-                    heapq.heappush(queue, (new_pos, path + [move]))# append to the queue
+        goal_cell = self.cellOf(goal)
+        return search.aStar(self.successors, self.cellOf(start), goal_cell,
+                            search.euclidean(self.width, goal_cell)) # euclidian to goal
 
-        else:
-            return []
     def getNewPosition(self, position, move):
         """
         Computes a new position given a move direction.
@@ -233,13 +177,12 @@ class PuzzleWorld(World):
         :param move: The move direction (NORTH, SOUTH, EAST, WEST)
         :return: A new Pose object representing the new position
         """
-        new_pos = Pose() # init pose
-        new_pos.x = position.x + (1 if move == Directions.EAST else -1 if move == Directions.WEST else 0) # increment x
-        new_pos.y = position.y + (1 if move == Directions.NORTH else -1 if move == Directions.SOUTH else 0) # increment y
+        x = position.x + (1 if move == Directions.EAST else -1 if move == Directions.WEST else 0) # increment x
+        y = position.y + (1 if move == Directions.NORTH else -1 if move == Directions.SOUTH else 0) # increment y
         
-        new_pos.cost = abs(new_pos.x-position.x) + abs(new_pos.y-position.y) + position.cost
+        cost = abs(x-position.x) + abs(y-position.y) + position.cost
 
-        return new_pos # return new pose
+        return Pose(x, y, cost) # return new pose
 
     # A move is a list of the directions that [Link, Wumpus1, Wumpus2,
     # ...] move in.  takeStep decodes these and makes the relevant
@@ -257,10 +200,14 @@ class PuzzleWorld(World):
         if move[0] != 0: # if move for link
             direction = move[0] # get move direction
             if direction and isinstance(direction, Directions): # if direction is actually a direction
-                self.lLoc = self.getNewPosition(self.lLoc, direction) # move folloeing the direction
+                new_pos = self.getNewPosition(self.lLoc, direction) # get new position
+                if 0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY: # moves off the grid have no effect
+                    self.lLoc = new_pos # move folloeing the direction
         
         for i in range(1, len(self.wLoc) + 1): # for each wumpus
             if move[i] != 0: # if moved
                 direction = move[i] # get direction of move
                 if direction and isinstance(direction, Directions): # ensure actually a direction
-                    self.wLoc[i - 1] = self.getNewPosition(self.wLoc[i - 1], direction) #move to new position
+                    new_pos = self.getNewPosition(self.wLoc[i - 1], direction) # get new position
+                    if 0 <= new_pos.x <= self.maxX and 0 <= new_pos.y <= self.maxY: # moves off the grid have no effect
+                        self.placeWumpus(i - 1, new_pos.x, new_pos.y) #move to new position
@@ -0,0 +1,174 @@
+# recorder.py
+#
+# Recording every step of a game or puzzle to a compact binary file,
+# and reading it back.
+#
+# printGameState gives a readable picture of the world, but for long
+# evaluation campaigns that is far too much text. A trace file holds a
+# short header describing the layout, followed by one fixed-width
+# record per step:
+#
+#   step     uint32   0 is the state before the first move
+#   link     cell id of Link
+#   wumpus   cell id of each Wumpus
+#   latency  float32  seconds spent choosing the move
+#   looted   uint8    1 if Link looted gold on this step
+#   status   uint8    State value after this step
+#
+# Cell ids are uint16 when the grid has at most 65536 cells and uint32
+# otherwise, so with two Wumpus on a small grid a record is 16
+# bytes. Everything is little-endian and unpadded.
+#
+# The header is:
+#
+#   magic     4 bytes  b'WTRC'
+#   version   uint16
+#   kind      uint8    0 for a game, 1 for a puzzle
+#   cellSize  uint8    2 or 4, the size of a cell id
+#   width, height, numberOfWumpus, numberOfGold, numberOfPits,
+#   goalSize, recordSize                 uint16 each
+#   dataOffset uint32  where the first record starts
+#
+# followed by the cell ids of the pits, the gold at the start, and
+# (for a puzzle) the goal: Link then the Wumpus. The records run from
+# dataOffset to the end of the file, so the file can be memory-mapped
+# and record k read directly.
+
+import mmap
+import struct
+from utils import State
+
+MAGIC = b'WTRC'
+VERSION = 1
+GAME = 0
+PUZZLE = 1
+
+HEADER = struct.Struct('<4sHBBHHHHHHHI')
+
+# How much to collect in memory before writing it out.
+CHUNK_SIZE = 1 << 20
+
+# The struct for one record, given the number of Wumpus and the size
+# of a cell id.
+def recordStruct(numberOfWumpus, cellSize):
+    cell = 'H' if cellSize == 2 else 'I'
+    return struct.Struct('<I' + cell * (1 + numberOfWumpus) + 'fBB')
+
+# Where to write the trace of a given run. A "{run}" in the path is
+# replaced by the run number; otherwise, if there is more than one
+# run, the number goes before the extension.
+def runPath(path, run, count):
+    if '{run}' in path:
+        return path.replace('{run}', str(run))
+    if count == 1:
+        return path
+    dot = path.rfind('.')
+    if dot <= max(path.rfind('/'), path.rfind('\\')):
+        return path + '-' + str(run)
+    return path[:dot] + '-' + str(run) + path[dot:]
+
+class TraceRecorder():
+
+    # Start a trace of world. For a puzzle, goal is the end state.
+    def __init__(self, path, world, goal=None):
+        self.width = world.width
+        self.numberOfWumpus = len(world.wLoc)
+        cells = world.width * world.height
+        cellSize = 2 if cells <= 1 << 16 else 4
+        self.record = recordStruct(self.numberOfWumpus, cellSize)
+
+        layout = [world.cellOf(loc) for loc in world.pLoc]
+        layout += [world.cellOf(loc) for loc in world.gLoc]
+        goalSize = 0
+        if goal is not None:
+            layout.append(goal.cellOf(goal.lLoc))
+            layout += [goal.cellOf(loc) for loc in goal.wLoc]
+            goalSize = 1 + len(goal.wLoc)
+        cell = 'H' if cellSize == 2 else 'I'
+        layoutBytes = struct.pack('<' + cell * len(layout), *layout)
+
+        header = HEADER.pack(MAGIC, VERSION, PUZZLE if goal is not None else GAME,
+                             cellSize, world.width, world.height,
+                             self.numberOfWumpus, len(world.gLoc), len(world.pLoc),
+                             goalSize, self.record.size,
+                             HEADER.size + len(layoutBytes))
+        self.file = open(path, 'wb')
+        self.file.write(header + layoutBytes)
+
+        self.buffer = bytearray()
+        self.step = 0
+        self.add(world, 0.0)
+
+    # Record the state of world after a step. latency is the time
+    # taken to choose the move.
+    def add(self, world, latency):
+        width = self.width
+        cells = [loc.y * width + loc.x for loc in world.wLoc]
+        self.buffer += self.record.pack(self.step, world.lLoc.y * width + world.lLoc.x,
+                                        *cells, latency, world.looted,
+                                        world.status.value)
+        self.step += 1
+        # Keep the latest record in memory, so that close() can fill
+        # in the final status.
+        if len(self.buffer) >= CHUNK_SIZE:
+            keep = len(self.buffer) - self.record.size
+            self.file.write(self.buffer[:keep])
+            del self.buffer[:keep]
+
+    # Finish the trace. The game loops only find out that the game has
+    # ended after the last step is recorded, so the status of the last
+    # record is set from world here.
+    def close(self, world):
+        if self.buffer:
+            self.buffer[-1] = world.status.value
+        self.file.write(self.buffer)
+        self.file.close()
+
+class TraceReader():
+
+    # Open a trace file and map it into memory.
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.kind, self.cellSize, self.width, self.height,
+         self.numberOfWumpus, self.numberOfGold, self.numberOfPits,
+         goalSize, recordSize, self.dataOffset) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a trace file this version can read")
+        self.record = recordStruct(self.numberOfWumpus, self.cellSize)
+
+        cell = 'H' if self.cellSize == 2 else 'I'
+        count = self.numberOfPits + self.numberOfGold + goalSize
+        layout = struct.unpack_from('<' + cell * count, self.data, HEADER.size)
+        self.pits = layout[:self.numberOfPits]
+        self.gold = layout[self.numberOfPits:self.numberOfPits + self.numberOfGold]
+        self.goal = layout[self.numberOfPits + self.numberOfGold:]
+
+    # How many records there are.
+    def __len__(self):
+        return (len(self.data) - self.dataOffset) // self.record.size
+
+    # Record k, as a tuple (step, link, wumpus, latency, looted,
+    # status) with wumpus a tuple of cell ids and status a State.
+    def __getitem__(self, k):
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("no record " + str(k))
+        fields = self.record.unpack_from(self.data, self.dataOffset + k * self.record.size)
+        wumpus = fields[2:2 + self.numberOfWumpus]
+        return (fields[0], fields[1], wumpus, fields[-3], fields[-2], State(fields[-1]))
+
+    # The records as a NumPy structured array that reads straight from
+    # the file. Needs NumPy.
+    def asArray(self):
+        import numpy as np
+        cell = '<u2' if self.cellSize == 2 else '<u4'
+        dtype = np.dtype([('step', '<u4'), ('link', cell),
+                          ('wumpus', cell, (self.numberOfWumpus,)),
+                          ('latency', '<f4'), ('looted', 'u1'), ('status', 'u1')])
+        return np.memmap(self.file, dtype=dtype, mode='r', offset=self.dataOffset)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
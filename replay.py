@@ -0,0 +1,135 @@
+# replay.py
+#
+# Code that replays a recorded game or puzzle (see recorder.py).
+#
+# Rather than run the game again, including all of Link's planning,
+# the replay rebuilds the state of the World at each step straight
+# from the trace. A record holds where Link and the Wumpus are and the
+# game status, so the only thing that has to be worked out is which
+# gold is left. To avoid working through the whole trace for that,
+# the replay keeps a keyframe --- the gold that is left --- every
+# KEYFRAME_INTERVAL steps, and a list of the steps on which gold was
+# looted. Seeking to step k then costs one record read, one keyframe,
+# and the few loot events since it.
+#
+# Run this on its own using:
+# python replay.py <trace file> [<step>]
+#
+# but better is to invoke it through wumpus.py -r.
+
+import bisect
+import sys
+import time
+import config
+import events
+import utils
+from recorder import TraceReader, PUZZLE
+from world import World
+
+# How many steps apart the keyframes are.
+KEYFRAME_INTERVAL = 1000
+
+class Replay():
+
+    def __init__(self, path):
+        self.trace = TraceReader(path)
+        trace = self.trace
+        step, link, wumpus, latency, looted, status = trace[0]
+
+        # The world we replay into, and for a puzzle, the end state.
+        self.world = World.fromLayout(trace.width, trace.height, link, wumpus,
+                                      trace.gold, trace.pits)
+        self.goal = None
+        if trace.kind == PUZZLE:
+            self.goal = World.fromLayout(trace.width, trace.height, trace.goal[0],
+                                         trace.goal[1:], [], [])
+
+        # The steps on which gold was looted, and where Link (and so
+        # the gold) was. The looted flags are read as one strided
+        # slice of the file, which is far quicker than reading each
+        # record.
+        lootedAt = trace.record.size - 2
+        flags = trace.data[trace.dataOffset + lootedAt::trace.record.size]
+        self.lootSteps = []
+        self.lootCells = []
+        k = flags.find(1)
+        while k >= 0:
+            self.lootSteps.append(k)
+            self.lootCells.append(trace[k][1])
+            k = flags.find(1, k + 1)
+
+        # The gold left at steps 0, KEYFRAME_INTERVAL, 2 *
+        # KEYFRAME_INTERVAL, ...
+        self.keyframes = []
+        gold = list(trace.gold)
+        j = 0
+        for start in range(0, len(trace), KEYFRAME_INTERVAL):
+            while j < len(self.lootSteps) and self.lootSteps[j] <= start:
+                gold.remove(self.lootCells[j])
+                j += 1
+            self.keyframes.append(tuple(gold))
+
+        self.step = -1
+
+    # How many steps there are, counting the starting state.
+    def __len__(self):
+        return len(self.trace)
+
+    # Put the world into the state it was in after step k, and return
+    # it.
+    def seek(self, k):
+        if k < 0:
+            k += len(self)
+        frame = k // KEYFRAME_INTERVAL
+        gold = list(self.keyframes[frame])
+        j = bisect.bisect_right(self.lootSteps, frame * KEYFRAME_INTERVAL)
+        while j < len(self.lootSteps) and self.lootSteps[j] <= k:
+            gold.remove(self.lootCells[j])
+            j += 1
+
+        step, link, wumpus, latency, looted, status = self.trace[k]
+        self.world.restore((link, status, bool(looted)) + tuple(wumpus) + tuple(gold))
+        self.step = k
+        return self.world
+
+    # How long the decision for step k took, in seconds.
+    def latency(self, k):
+        return self.trace[k][3]
+
+    def close(self):
+        self.trace.close()
+
+# Show a recorded run from step start to the end, or, if we are
+# running headless, print the state at step start.
+def main(path, start=0):
+    replay = Replay(path)
+    world = replay.seek(start)
+
+    if config.headless:
+        events.info("Step %d of %d: %s", replay.step, len(replay) - 1, world.status.name)
+        utils.printGameState(world)
+        replay.close()
+        return world.status
+
+    from dungeon import Dungeon
+    display = Dungeon(world)
+    if replay.goal is not None:
+        show = Dungeon(replay.goal)
+        show.update()
+    display.update()
+    time.sleep(1)
+    for k in range(replay.step + 1, len(replay)):
+        replay.seek(k)
+        display.update()
+        time.sleep(0.1)
+    events.info("Replayed to step %d: %s", replay.step, world.status.name)
+
+    display.close()
+    if replay.goal is not None:
+        show.close()
+    replay.close()
+    return world.status
+
+# Since we explicitly named the main function
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,116 @@
+# riskField.py
+#
+# A cost for Link to move into each cell, worked out for the whole
+# grid at once with NumPy.
+#
+# The other planners test each cell they look at against the danger
+# rules, first keeping out of windy cells and then, if that finds no
+# path, searching again allowing them. Here the rules are turned into
+# a cost grid once a turn, and one cheapest-path search over it does
+# the job of both passes:
+#
+# - cells with a pit or a Wumpus, and smelly cells, can't be entered;
+# - windy cells cost WINDY_COST, which is more than any path without
+#   them can cost, so they are only used if there is no other way;
+# - other cells cost 1, plus a little more the nearer they are to a
+#   Wumpus (up to NEAR moves away), so that paths keep their distance
+#   where they can.
+#
+# Which cells are next to a pit is found by shifting the grid one cell
+# in each direction. The pits never move, so their part is only worked
+# out once. The Wumpus only change the costs within NEAR moves of
+# them, so their part is added a small window at a time, and the
+# costs are only worked out again for the windows around Wumpus that
+# have moved since the last turn.
+#
+import numpy as np
+from world import PIT
+
+# How far from a Wumpus cells cost extra.
+NEAR = 3
+
+# The cells next to the cells set in grid, a boolean array of the
+# same shape, found by shifting it one cell each way.
+def neighbours(grid):
+    out = np.zeros_like(grid)
+    out[1:, :] |= grid[:-1, :]
+    out[:-1, :] |= grid[1:, :]
+    out[:, 1:] |= grid[:, :-1]
+    out[:, :-1] |= grid[:, 1:]
+    return out
+
+class RiskField():
+
+    def __init__(self, world):
+        self.world = world
+        shape = (world.height, world.width) # row y holds cells y * width to y * width + width - 1
+        occupancy = np.array(world.occupancy).reshape(shape)
+        self.pits = (occupancy & PIT) != 0
+        self.windy = neighbours(self.pits) & ~self.pits
+
+        # More than the cost of any path that avoids windy cells: one
+        # for every cell, plus the most that being near a Wumpus adds.
+        self.windyCost = world.width * world.height * (NEAR + 1)
+
+        # What moving into each cell costs with no Wumpus about.
+        self.base = np.ones(shape)
+        self.base[self.windy] = self.windyCost
+        self.base[self.pits] = np.inf
+
+        # What a Wumpus adds to the cells around it, as a square of
+        # side 2 * NEAR + 1 with the Wumpus in the middle.
+        dy, dx = np.indices((2 * NEAR + 1, 2 * NEAR + 1)) - NEAR
+        self.near = np.maximum(0, NEAR + 1 - np.abs(dx) - np.abs(dy))
+
+        self.wumpus = None # the Wumpus cells the costs were last worked out for
+        self.flat = self.base.ravel().tolist()
+
+    # The rows and columns of the window of cells within NEAR moves
+    # of cell, clipped to the grid, as slices of the grid and the
+    # matching slices of self.near.
+    def window(self, cell):
+        width = self.world.width
+        height = self.world.height
+        x = cell % width
+        y = cell // width
+        rows = slice(max(0, y - NEAR), min(height, y + NEAR + 1))
+        columns = slice(max(0, x - NEAR), min(width, x + NEAR + 1))
+        nearRows = slice(rows.start - y + NEAR, rows.stop - y + NEAR)
+        nearColumns = slice(columns.start - x + NEAR, columns.stop - x + NEAR)
+        return rows, columns, nearRows, nearColumns
+
+    # The cost of moving into each cell this turn, as a flat list
+    # indexed by cell id, with inf for cells that can't be entered.
+    # The list is kept between turns and changed in place, so it
+    # should not be changed by the caller.
+    def costs(self):
+        world = self.world
+        wumpus = world.wumpusCells()
+        if wumpus == self.wumpus:
+            return self.flat
+
+        # The extra cost of the nearest Wumpus is the largest any of
+        # them adds, and cells with a Wumpus or next to one are
+        # blocked.
+        cost = self.base.copy()
+        extra = np.zeros(cost.shape)
+        for cell in wumpus:
+            rows, columns, nearRows, nearColumns = self.window(cell)
+            np.maximum(extra[rows, columns], self.near[nearRows, nearColumns], out=extra[rows, columns])
+        cost += extra
+        flatCost = cost.reshape(-1) # a view, so setting cells blocks them in cost
+        for cell in wumpus:
+            flatCost[cell] = np.inf
+            for direction, nextCell in world.successors[cell]:
+                flatCost[nextCell] = np.inf
+
+        if self.wumpus is None: # nothing worked out yet, so the whole grid is new
+            self.flat = flatCost.tolist()
+        else:
+            width = world.width
+            for cell in set(wumpus).symmetric_difference(self.wumpus): # the cells Wumpus have moved from or to
+                rows, columns, nearRows, nearColumns = self.window(cell)
+                for y in range(rows.start, rows.stop):
+                    self.flat[y * width + columns.start:y * width + columns.stop] = cost[y, columns].tolist()
+        self.wumpus = wumpus
+        return self.flat
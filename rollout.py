@@ -0,0 +1,234 @@
+# rollout.py
+#
+# Choosing Link's move by trying each move out in many simulated
+# futures (Monte Carlo rollouts).
+#
+# When the Wumpus wander at random, or Link's own moves slip
+# (config.nonDeterministic), the shortest path to the gold is not
+# necessarily the best way to go. Here each possible move is scored by
+# playing the game on from it many times, in a copy of the world that
+# moves the Wumpus and Link with the world's own rules
+# (World.updateWumpus and World.probabilisticMotion), with Link
+# following a quick greedy policy after the first move. The move with
+# the best average score is the one made.
+#
+# Every rollout k on a turn gets its own random number generator,
+# made from a seed drawn from the game's generator and k (see
+# utils.makeRng), and rollout k uses the same stream whichever move it
+# is scoring, so the moves are compared on the same futures. The
+# rollouts are shared out in batches between config.rolloutWorkers
+# processes, and new batches are started until config.rolloutBudget
+# seconds have passed, so the more cores there are, the more futures
+# each decision is based on.
+#
+# Use it by setting planner = "rollout" in config.py.
+
+import atexit
+import multiprocessing
+import os
+import time
+import config
+import search
+import utils
+from world import PIT, WUMPUS
+
+# How a rollout is scored: GOLD_VALUE for each gold looted, less one
+# for each move made, less DEATH_COST if Link dies. If the rollout
+# ends with gold left, the distance to the nearest gold is taken off
+# as well.
+GOLD_VALUE = 100
+DEATH_COST = 1000
+
+# The pool of worker processes, made the first time it is needed.
+pool = None
+poolSize = 0
+
+# How many processes to run the rollouts in. A process that is itself
+# a worker (as the runs are with wumpus.py -j) can't start processes
+# of its own, so it does the rollouts itself.
+def workerCount():
+    if multiprocessing.current_process().daemon:
+        return 1
+    if config.rolloutWorkers > 0:
+        return config.rolloutWorkers
+    return os.cpu_count() or 1
+
+def getPool(workers):
+    global pool, poolSize
+    if pool is not None and poolSize != workers:
+        close()
+    if pool is None:
+        pool = multiprocessing.Pool(workers)
+        poolSize = workers
+        atexit.register(close)
+    return pool
+
+def close():
+    global pool
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+        pool = None
+
+# Choose one of moves for Link in world. New batches are started
+# until the rollout budget runs out, or deadline (a time.time() value)
+# if one is given and it is sooner. With a deadline, rollouts still
+# running when it passes are cut short and don't count, and if none
+# has finished, search.OutOfTime is raised. Without one, at least one
+# batch is always finished.
+def chooseMove(world, moves, deadline=None):
+    stop = time.time() + config.rolloutBudget
+    if deadline is not None and deadline < stop:
+        stop = deadline
+    seed = world.rng.getrandbits(32)
+    batch = config.rolloutBatch
+    limit = config.rolloutLimit
+    # The workers might not share this process's config (they don't
+    # on Windows, or if it has been changed since they started), so
+    # the settings the rollouts depend on go with each batch.
+    settings = (config.dynamic, config.nonDeterministic,
+                config.directionProbability, config.senseDistance)
+    totals = [0] * len(moves)
+    done = 0
+
+    workers = workerCount()
+    if workers == 1:
+        started = 0
+        while started < limit and (time.time() < stop or (done == 0 and deadline is None)):
+            job = (world, moves, seed, started, batch, config.rolloutDepth, settings, deadline)
+            scores, finished = runBatch(job)
+            for i, score in enumerate(scores):
+                totals[i] += score
+            done += finished
+            started += batch
+    else:
+        workerPool = getPool(workers)
+        pending = []
+        started = 0
+        while True:
+            # Keep every worker busy, with a batch waiting behind it.
+            while started < limit and len(pending) < 2 * workers and time.time() < stop:
+                job = (world, moves, seed, started, batch, config.rolloutDepth, settings, deadline)
+                pending.append(workerPool.apply_async(runBatch, (job,)))
+                started += batch
+            if not pending:
+                break
+            # Wait for the oldest batch, but not past the stopping time
+            # once there is something to go on, and never past the
+            # deadline.
+            if done == 0 and deadline is None:
+                timeout = None
+            else:
+                timeout = max(0, stop - time.time())
+            try:
+                scores, finished = pending[0].get(timeout)
+            except multiprocessing.TimeoutError:
+                break
+            pending.pop(0)
+            for i, score in enumerate(scores):
+                totals[i] += score
+            done += finished
+        # Batches still running when time is up are left to finish
+        # and their results ignored; they stop at the deadline, and
+        # are kept small so that doesn't eat much into the next turn.
+
+    if done == 0:
+        raise search.OutOfTime()
+    best = max(range(len(moves)), key=lambda i: totals[i])
+    return moves[best]
+
+# Run rollouts first to first + count - 1 for each move, stopping
+# early if deadline (a time.time() value, or None) passes, and return
+# the total score for each move over the rollouts that were finished
+# for every move, and how many those were. A rollout cut short is
+# left out for every move, so they are still compared on the same
+# futures. This is what the workers run.
+def runBatch(job):
+    world, moves, seed, first, count, depth, settings, deadline = job
+    config.dynamic, config.nonDeterministic, config.directionProbability, config.senseDistance = settings
+    twin = world.clone()
+    start = twin.snapshot()
+    totals = [0] * len(moves)
+    finished = 0
+    for k in range(first, first + count):
+        scores = []
+        for move in moves:
+            twin.restore(start)
+            twin.rng = utils.makeRng(seed, k)
+            score = rollout(twin, move, depth, deadline)
+            if score is None:
+                return totals, finished
+            scores.append(score)
+        for i, score in enumerate(scores):
+            totals[i] += score
+        finished += 1
+    return totals, finished
+
+# Play world on for up to depth turns, starting with Link making move,
+# and return the score, or None if deadline (a time.time() value, or
+# None) passes first. The world is changed.
+#
+# A turn is as in game.py: Link moves, then the Wumpus, and then the
+# game is over if all the gold is gone, or else if Link is in a pit or
+# with a Wumpus. Link's own move and the looting are done here on cell
+# ids, rather than through World.updateLink, which is slower and
+# reports every gold looted.
+def rollout(world, move, depth, deadline=None):
+    width = world.width
+    successors = world.successors
+    occupancy = world.occupancy
+    cell = world.cellOf(world.lLoc)
+    gold = set([world.cellOf(loc) for loc in world.gLoc])
+    score = 0
+    for turn in range(depth):
+        if deadline is not None and time.time() > deadline:
+            return None
+        if turn > 0:
+            move = greedyMove(world, cell, gold)
+        move = world.probabilisticMotion(move)
+        for direction, nextCell in successors[cell]:
+            if direction == move:
+                cell = nextCell
+                break
+        world.lLoc = world.poseOf(cell)
+        score -= 1
+        if cell in gold:
+            gold.discard(cell)
+            score += GOLD_VALUE
+        world.updateWumpus()
+        if not gold:
+            return score
+        if occupancy[cell] & (PIT | WUMPUS):
+            return score - DEATH_COST
+
+    x = cell % width
+    y = cell // width
+    return score - min([abs(g % width - x) + abs(g // width - y) for g in gold])
+
+# The move Link makes in a rollout: towards the nearest gold, by
+# Manhattan distance, through the safest cells there are --- neither
+# smelly, windy nor holding a pit or Wumpus if possible, and then not
+# smelly or deadly, and then anywhere. Ties are broken at random.
+def greedyMove(world, cell, gold):
+    width = world.width
+    stench = world.stench
+    breeze = world.breeze
+    occupancy = world.occupancy
+    options = []
+    best = None
+    for level in (0, 1, 2):
+        for direction, nextCell in world.successors[cell]:
+            if level < 2 and (stench[nextCell] or occupancy[nextCell] & (PIT | WUMPUS)):
+                continue
+            if level < 1 and breeze[nextCell]:
+                continue
+            x = nextCell % width
+            y = nextCell // width
+            distance = min([abs(g % width - x) + abs(g // width - y) for g in gold])
+            if best is None or distance < best:
+                best = distance
+                options = [direction]
+            elif distance == best:
+                options.append(direction)
+        if options:
+            return world.rng.choice(options)
@@ -0,0 +1,467 @@
+# search.py
+#
+# The grid searches used by Link and PuzzleWorld.
+#
+# Every search works on cell ids (y * width + x, see World.cellIndex)
+# and on a successor table like World.successors, which gives the
+# (direction, cell) pairs that can be reached from each cell (except
+# jumpPoint, which needs the grid itself, and so its size). Rather
+# than copy the path so far into every queue entry, a search records,
+# for each cell it reaches, the cell it came from and the move it
+# made, and follows these back from the goal at the end. Which cells
+# have been reached, and the best cost to each, are kept in flat lists
+# indexed by cell id.
+#
+# What can be moved through, what a move costs and how far a cell
+# looks from the goal are passed in as functions:
+#
+#   passable(cell)           True if the cell can be moved into;
+#                            None means every cell can
+#   cost(fromCell, toCell)   the cost of a move; None means 1
+#   heuristic(cell)          an estimate of the cost to the goal
+#
+# The start cell is never tested for passability. All the searches
+# return a list of Directions, which is empty if the goal cannot be
+# reached (or if start is the goal).
+#
+# Ties between equal priorities are broken in the order the cells
+# were found, and successors are tried in the order the table gives
+# them, so a search always returns the same path for the same world.
+#
+# Searches that take a deadline (a time.time() value, or None for no
+# limit) raise OutOfTime if it passes before they finish. The clock is
+# only read every CHECK_EVERY cells, so the overrun is small.
+
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from utils import Directions
+
+INFINITY = float('inf')
+
+# How many cells a search expands between looks at the clock.
+CHECK_EVERY = 64
+
+# The weights anytimeAStar tries, largest first.
+ANYTIME_WEIGHTS = (3, 2, 1.5, 1)
+
+class OutOfTime(Exception):
+    pass
+
+# Follow the parent links back from goal to start, and return the
+# moves in the order they are made.
+def pathTo(parent, via, start, goal):
+    path = []
+    cell = goal
+    while cell != start:
+        path.append(via[cell])
+        cell = parent[cell]
+    path.reverse()
+    return path
+
+# Breadth first search. Finds a path with the fewest moves.
+def bfs(successors, start, goal, passable=None):
+    cells = len(successors)
+    parent = [-1] * cells
+    via = [None] * cells
+    seen = bytearray(cells)
+    seen[start] = 1
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        if current == goal:
+            return pathTo(parent, via, start, goal)
+        for move, cell in successors[current]:
+            if not seen[cell] and (passable is None or passable(cell)):
+                seen[cell] = 1
+                parent[cell] = current
+                via[cell] = move
+                queue.append(cell)
+    return []
+
+# Breadth first search for the nearest of several goals: the fewest
+# moves from start to a cell, other than start, for which
+# isGoal(cell) is True.
+def bfsNearest(successors, start, isGoal, passable=None):
+    cells = len(successors)
+    parent = [-1] * cells
+    via = [None] * cells
+    seen = bytearray(cells)
+    seen[start] = 1
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        if current != start and isGoal(current):
+            return pathTo(parent, via, start, current)
+        for move, cell in successors[current]:
+            if not seen[cell] and (passable is None or passable(cell)):
+                seen[cell] = 1
+                parent[cell] = current
+                via[cell] = move
+                queue.append(cell)
+    return []
+
+# Depth first search. Finds a path, but not usually a short one.
+#
+# A cell can be pushed more than once, and it is the last push that
+# gets popped first, so the parent of a cell is only fixed when it is
+# popped.
+def dfs(successors, start, goal, passable=None):
+    cells = len(successors)
+    parent = [-1] * cells
+    via = [None] * cells
+    visited = bytearray(cells)
+    stack = [(start, -1, None)]
+    while stack:
+        current, previous, move = stack.pop()
+        if visited[current]:
+            continue
+        visited[current] = 1
+        parent[current] = previous
+        via[current] = move
+        if current == goal:
+            return pathTo(parent, via, start, goal)
+        for move, cell in successors[current]:
+            if not visited[cell] and (passable is None or passable(cell)):
+                stack.append((cell, current, move))
+    return []
+
+# The priority queue searches. The priority of a cell is g + h for A*
+# and uniform cost (where h is 0), and just h for greedy search; g is
+# the cost of the path found to the cell. A cell is only pushed again
+# if a cheaper path to it is found (for greedy search, never), and
+# entries for cells that have already been expanded are skipped when
+# they are popped.
+#
+# Returns the path and its cost, or ([], INFINITY) if there is no
+# path.
+def bestFirst(successors, start, goal, passable=None, cost=None, heuristic=None, greedy=False, deadline=None):
+    cells = len(successors)
+    parent = [-1] * cells
+    via = [None] * cells
+    g = [INFINITY] * cells
+    closed = bytearray(cells)
+    tie = itertools.count()
+    g[start] = 0
+    queue = [(heuristic(start) if heuristic else 0, next(tie), start, 0, -1, None)]
+    expanded = 0
+    while queue:
+        priority, _, current, gCurrent, previous, move = heapq.heappop(queue)
+        if closed[current]:
+            continue
+        closed[current] = 1
+        expanded += 1
+        if deadline is not None and expanded % CHECK_EVERY == 0 and time.time() > deadline:
+            raise OutOfTime()
+        parent[current] = previous
+        via[current] = move
+        if current == goal:
+            return pathTo(parent, via, start, goal), gCurrent
+        for move, cell in successors[current]:
+            if closed[cell] or not (passable is None or passable(cell)):
+                continue
+            gCell = gCurrent + (1 if cost is None else cost(current, cell))
+            if greedy:
+                if g[cell] != INFINITY:
+                    continue
+                priority = heuristic(cell)
+            else:
+                if gCell >= g[cell]:
+                    continue
+                priority = gCell + heuristic(cell) if heuristic else gCell
+            g[cell] = gCell
+            heapq.heappush(queue, (priority, next(tie), cell, gCell, current, move))
+    return [], INFINITY
+
+# Uniform cost search. Finds a cheapest path.
+def uniformCost(successors, start, goal, passable=None, cost=None):
+    return bestFirst(successors, start, goal, passable, cost)[0]
+
+# Greedy best first search, always expanding the cell that looks
+# closest to the goal. Fast, but the path need not be the shortest.
+def greedy(successors, start, goal, heuristic, passable=None):
+    return bestFirst(successors, start, goal, passable, None, heuristic, True)[0]
+
+# A* search. Finds a cheapest path provided heuristic never
+# overestimates.
+def aStar(successors, start, goal, heuristic, passable=None, cost=None):
+    return bestFirst(successors, start, goal, passable, cost, heuristic)[0]
+
+# Anytime A*. A* with the heuristic multiplied by a weight w finds a
+# path costing at most w times the cheapest, and the larger w is the
+# fewer cells it looks at, so a path turns up quickly. The searches
+# are run with the weights in turn, keeping the cheapest path so far,
+# until the search with weight 1 (the cheapest path) finishes or the
+# deadline passes. Returns the path and its cost, or ([], INFINITY) if
+# there is no path or none was found in time.
+def anytimeAStar(successors, start, goal, heuristic, passable=None, cost=None, deadline=None, weights=ANYTIME_WEIGHTS):
+    best = ([], INFINITY)
+    for weight in weights:
+        if deadline is not None and time.time() > deadline:
+            break
+        weighted = lambda cell: weight * heuristic(cell)
+        try:
+            path, pathCost = bestFirst(successors, start, goal, passable, cost, weighted, False, deadline)
+        except OutOfTime:
+            break
+        if pathCost == INFINITY: # no path at all, whatever the weight
+            break
+        if pathCost < best[1]:
+            best = (path, pathCost)
+    return best
+
+# Jump point search (Harabor and Grastien, 2011), for a width by height
+# grid on which every move is one cell N, S, E or W and costs 1. Finds
+# a shortest path, like A*, but on open ground it expands far fewer
+# cells.
+#
+# On an open grid there are many shortest paths between two cells,
+# differing only in the order of their moves, and A* expands the cells
+# on all of them. Here only paths that go straight until they have to
+# turn are followed. From each cell the search jumps along a row or
+# column until it reaches a jump point, a cell where a path might have
+# to turn: the goal, a cell next to the end of an obstacle, or (going
+# up or down a column) a cell from which a jump along the row finds a
+# jump point. Only jump points are put on the queue, and a path is a
+# list of them joined by straight lines, which are filled in when the
+# path is built. Ties between equal priorities go to the cell nearest
+# the goal, so on open ground the search heads straight there.
+#
+# Inside, the grid has a border of cells that can't be entered, so
+# the jumps don't have to look out for the edges, and cells are
+# numbered on the bordered grid. Which cells can be entered is tested
+# once each, as the jumps come to them, and jumps along rows are
+# remembered, since the same row is jumped along from every cell of a
+# column that crosses it.
+#
+# Returns the path and its cost, or ([], INFINITY), as bestFirst
+# does.
+def jumpPoint(width, height, start, goal, passable=None, deadline=None):
+    across = width + 2
+    cells = across * (height + 2)
+    # state[cell] is 0 until cell is tested, then 1 if it can be
+    # entered and 2 if not. The jumps read it as (state[cell] or
+    # test(cell)), so only the first look at a cell makes a call.
+    state = bytearray([1 if passable is None else 0]) * cells
+    state[:across] = state[-across:] = b'\x02' * across
+    state[::across] = state[across - 1::across] = b'\x02' * (height + 2)
+
+    def test(cell):
+        known = 1 if passable(cell - 2 * (cell // across) - width - 1) else 2 # the id without the border
+        state[cell] = known
+        return known
+
+    begin = (start // width + 1) * across + start % width + 1
+    end = (goal // width + 1) * across + goal % width + 1
+    state[begin] = 1 # the start is never tested
+    # along[1][cell] and along[-1][cell] are the first jump point east
+    # and west of cell, counting cell itself: -1 for none, and -2 if
+    # not worked out yet.
+    along = {1: [-2] * cells, -1: [-2] * cells}
+
+    # The first jump point east (step 1) or west (step -1) of cell.
+    def jumpAlong(cell, step):
+        known = along[step]
+        found = -1
+        jumped = []
+        cell += step
+        while (state[cell] or test(cell)) == 1:
+            if known[cell] != -2:
+                found = known[cell]
+                break
+            jumped.append(cell)
+            # An obstacle above or below has just ended, so a path may
+            # have to turn here.
+            above = cell + across
+            below = cell - across
+            if (cell == end
+                or (state[above] or test(above)) == 1 and (state[above - step] or test(above - step)) == 2
+                or (state[below] or test(below)) == 1 and (state[below - step] or test(below - step)) == 2):
+                found = cell
+                break
+            cell += step
+        for jumpedCell in jumped:
+            known[jumpedCell] = found
+        return found
+
+    # The first jump point north (step across) or south (step -across)
+    # of cell.
+    def jumpUpDown(cell, step):
+        cell += step
+        while (state[cell] or test(cell)) == 1:
+            if (cell == end
+                or (state[cell + 1] or test(cell + 1)) == 1 and (state[cell + 1 - step] or test(cell + 1 - step)) == 2
+                or (state[cell - 1] or test(cell - 1)) == 1 and (state[cell - 1 - step] or test(cell - 1 - step)) == 2
+                or jumpAlong(cell, 1) >= 0 or jumpAlong(cell, -1) >= 0):
+                return cell
+            cell += step
+        return -1
+
+    ex = end % across
+    ey = end // across
+    parent = [-1] * cells
+    g = [INFINITY] * cells
+    closed = bytearray(cells)
+    tie = itertools.count()
+    g[begin] = 0
+    h = abs(begin % across - ex) + abs(begin // across - ey)
+    queue = [(h, h, next(tie), begin, 0, -1)]
+    expanded = 0
+    while queue:
+        priority, h, _, current, gCurrent, previous = heapq.heappop(queue)
+        if closed[current]:
+            continue
+        closed[current] = 1
+        expanded += 1
+        if deadline is not None and expanded % CHECK_EVERY == 0 and time.time() > deadline:
+            raise OutOfTime()
+        parent[current] = previous
+        if current == end:
+            return jumpPath(across, parent, begin, end), gCurrent
+        # Carry on the way the path came, or turn either way across
+        # it; turning back is never shorter.
+        if previous < 0:
+            steps = (1, -1, across, -across)
+        elif previous // across == current // across:
+            steps = (1 if current > previous else -1, across, -across)
+        else:
+            steps = (across if current > previous else -across, 1, -1)
+        for step in steps:
+            if step == 1 or step == -1:
+                cell = jumpAlong(current, step)
+            else:
+                cell = jumpUpDown(current, step)
+            if cell < 0 or closed[cell]:
+                continue
+            gCell = gCurrent + abs(cell % across - current % across) + abs(cell // across - current // across)
+            if gCell >= g[cell]:
+                continue
+            g[cell] = gCell
+            h = abs(cell % across - ex) + abs(cell // across - ey)
+            heapq.heappush(queue, (gCell + h, h, next(tie), cell, gCell, current))
+    return [], INFINITY
+
+# Follow the parent links of jumpPoint back from goal to start, filling
+# in the straight runs between jump points. Cells are numbered on a
+# grid of the given width.
+def jumpPath(width, parent, start, goal):
+    path = []
+    cell = goal
+    while cell != start:
+        previous = parent[cell]
+        if previous // width == cell // width:
+            run = cell - previous
+            move = Directions.EAST if run > 0 else Directions.WEST
+        else:
+            run = (cell - previous) // width
+            move = Directions.NORTH if run > 0 else Directions.SOUTH
+        path.extend([move] * abs(run))
+        cell = previous
+    path.reverse()
+    return path
+
+# Heuristics for a grid of the given width: the straight line and the
+# Manhattan distance from a cell to goal.
+def euclidean(width, goal):
+    gx = goal % width
+    gy = goal // width
+    return lambda cell: math.sqrt((cell % width - gx) ** 2 + (cell // width - gy) ** 2)
+
+def manhattan(width, goal):
+    gx = goal % width
+    gy = goal // width
+    return lambda cell: abs(cell % width - gx) + abs(cell // width - gy)
+
+class DistanceField():
+
+    # Distances from every cell to one goal cell, found by a breadth
+    # first search that runs backwards from the goal. Moves can always
+    # be undone, so the successors of a cell are also the cells that
+    # lead to it.
+    #
+    # The search is lazy: it only goes as far as it needs to answer
+    # the cells it is asked about, and carries on from where it
+    # stopped next time. passable is read as the search goes, so if
+    # what is passable changes, check touches() to see whether the
+    # field is still good.
+    def __init__(self, successors, goal, passable):
+        self.successors = successors
+        self.goal = goal
+        self.passable = passable
+        self.dist = [-1] * len(successors) # -1 until the search reaches a cell
+        self.queue = deque()
+        if passable(goal):
+            self.dist[goal] = 0
+            self.queue.append(goal)
+
+    # The number of moves from cell to the goal, or -1 if the goal
+    # can't be reached from cell. If deadline passes first, raises
+    # OutOfTime; the search so far is kept, and goes on from there
+    # next time.
+    def distance(self, cell, deadline=None):
+        dist = self.dist
+        if dist[cell] >= 0:
+            return dist[cell]
+        if not self.passable(cell):
+            return -1
+        passable = self.passable
+        successors = self.successors
+        queue = self.queue
+        expanded = 0
+        while queue and dist[cell] < 0:
+            expanded += 1
+            if deadline is not None and expanded % CHECK_EVERY == 0 and time.time() > deadline:
+                raise OutOfTime()
+            current = queue.popleft()
+            d = dist[current] + 1
+            for move, nextCell in successors[current]:
+                if dist[nextCell] < 0 and passable(nextCell):
+                    dist[nextCell] = d
+                    queue.append(nextCell)
+        return dist[cell]
+
+    # Run the search to the end, so every distance is known, and
+    # return the distances.
+    def complete(self):
+        dist = self.dist
+        successors = self.successors
+        passable = self.passable
+        queue = self.queue
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            for move, nextCell in successors[current]:
+                if dist[nextCell] < 0 and passable(nextCell):
+                    dist[nextCell] = d
+                    queue.append(nextCell)
+        return dist
+
+    # A field with every distance already known, as complete() gives
+    # them (for example read back from a cache). dist is only read, so
+    # it can be any sequence of ints.
+    @classmethod
+    def fromTable(cls, successors, goal, passable, dist):
+        field = object.__new__(cls)
+        field.successors = successors
+        field.goal = goal
+        field.passable = passable
+        field.dist = dist
+        field.queue = deque()
+        return field
+
+    # Could a change in whether these cells are passable change the
+    # distances found so far? It could if one of them is the goal, or
+    # the search has reached one of them or one of its neighbours
+    # (which is where it would have looked at the cell).
+    def touches(self, cells):
+        dist = self.dist
+        successors = self.successors
+        for cell in cells:
+            if dist[cell] >= 0 or cell == self.goal:
+                return True
+            for move, nextCell in successors[cell]:
+                if dist[nextCell] >= 0:
+                    return True
+        return False
@@ -0,0 +1,187 @@
+# spaceTime.py
+#
+# Planning Link's path around where the Wumpus are going to be, not
+# just where they are now.
+#
+# The other planners treat the Wumpus, and the smelly cells around
+# them, as fixed obstacles, so a path is usually out of date as soon
+# as the Wumpus move. Here Link plans over (cell, time), up to a
+# horizon of config.spaceTimeHorizon moves, keeping out of the way of
+# where the Wumpus will be when Link gets there. How the Wumpus move
+# comes from World.updateWumpus:
+#
+# - a Wumpus that can sense Link heads straight for them, along
+#   whichever axis they differ on, picking one at random if they
+#   differ on both. Where it goes depends on where Link goes, so the
+#   search carries, for each such Wumpus, the set of cells it could be
+#   in given the path so far, and a step is ruled out if it could end
+#   with the Wumpus in Link's cell;
+# - a Wumpus that can't sense Link makes a random move, so for these
+#   the chance of being in each cell after each turn is worked out
+#   up front, and cells where that is more than config.spaceTimeRisk
+#   are avoided at that time.
+#
+# The heuristic is the distance to the goal ignoring the Wumpus, which
+# never overestimates. A path that gets to the horizon without
+# reaching the goal is priced as its length plus that distance, and
+# the best such path is used.
+#
+# (The chasing model assumes a Wumpus that can sense Link keeps on
+# sensing them until the horizon. It closes in on Link at least as
+# fast as Link can get away, so it nearly always does.)
+
+import heapq
+import itertools
+import config
+import utils
+
+class WumpusForecast():
+
+    # Where the Wumpus in world will be over the next horizon turns.
+    # Cells where the chance of a randomly moving Wumpus is more than
+    # threshold count as unsafe.
+    def __init__(self, world, horizon, threshold):
+        self.width = world.width
+        self.threshold = threshold
+        link = world.lLoc
+        maxX = world.maxX
+        maxY = world.maxY
+
+        # The cells the chasing Wumpus are in now.
+        self.chasers = []
+
+        # odds[k] maps cell to the chance of a random Wumpus being
+        # there after k turns, added up over the Wumpus.
+        self.odds = [dict() for k in range(horizon + 1)]
+        for loc in world.wLoc:
+            # A Wumpus more than 2 * horizon away can't meet Link
+            # within the horizon.
+            if abs(loc.x - link.x) + abs(loc.y - link.y) > 2 * horizon:
+                continue
+            if config.dynamic and utils.separation(loc, link) < config.senseDistance:
+                self.chasers.append(frozenset([(loc.x, loc.y)]))
+                continue
+            here = {(loc.x, loc.y): 1.0}
+            for k in range(horizon + 1):
+                layer = self.odds[k]
+                for (x, y), p in here.items():
+                    cell = y * self.width + x
+                    layer[cell] = layer.get(cell, 0.0) + p
+                if k == horizon or not config.dynamic: # if they don't move, here stays the same
+                    continue
+                nextHere = {}
+                for (x, y), p in here.items():
+                    for position, q in randomMoves(x, y, maxX, maxY):
+                        nextHere[position] = nextHere.get(position, 0.0) + p * q
+                here = nextHere
+        self.chasers = tuple(self.chasers)
+
+    # Is a random Wumpus too likely to be in cell after k turns?
+    def unsafe(self, cell, k):
+        return self.odds[k].get(cell, 0.0) > self.threshold
+
+    # Where the chasing Wumpus could be after Link moves into cell,
+    # given where they could be before, or None if one of them could
+    # end up in or next to cell. (Letting a Wumpus get right next to
+    # Link is as bad as moving into a smelly cell: one wrong move
+    # later and Link is caught, and along a wall or in a corner there
+    # may be no right one.)
+    def chase(self, chasers, cell):
+        lx = cell % self.width
+        ly = cell // self.width
+        after = []
+        for positions in chasers:
+            moved = set()
+            for x, y in positions:
+                for (wx, wy), q in chaseMoves(x, y, lx, ly):
+                    if abs(wx - lx) + abs(wy - ly) <= 1:
+                        return None
+                    moved.add((wx, wy))
+            after.append(frozenset(moved))
+        return tuple(after)
+
+    # Is a plan that starts at cell start still safe?
+    def safe(self, successors, start, plan):
+        cell = start
+        chasers = self.chasers
+        for k, move in enumerate(plan, 1):
+            cell = dict(successors[cell]).get(move, cell)
+            if k >= len(self.odds) or self.unsafe(cell, k):
+                return False
+            chasers = self.chase(chasers, cell)
+            if chasers is None:
+                return False
+        return True
+
+# Where a Wumpus at (x, y) that is chasing Link at (lx, ly) goes, as
+# World.moveToLink, as (position, chance) pairs.
+def chaseMoves(x, y, lx, ly):
+    stepX = (x + (lx > x) - (lx < x), y)
+    stepY = (x, y + (ly > y) - (ly < y))
+    if x == lx:
+        return [(stepY, 1.0)]
+    if y == ly:
+        return [(stepX, 1.0)]
+    return [(stepX, 0.5), (stepY, 0.5)]
+
+# Where a Wumpus at (x, y) that is moving at random goes, as
+# World.makeRandomMove: it picks an axis, then a change of -1, 0 or 1,
+# and stays put if that would take it off the grid.
+def randomMoves(x, y, maxX, maxY):
+    moves = [((x, y), 1 / 3)]
+    for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+        if 0 <= nx <= maxX and 0 <= ny <= maxY:
+            moves.append(((nx, ny), 1 / 6))
+        else:
+            moves.append(((x, y), 1 / 6))
+    return moves
+
+# Plan a path of at most horizon moves from start towards goal.
+#
+# passable(cell) says if a cell is safe apart from the Wumpus (no pit,
+# and perhaps not windy), and distance(cell) is the length of the
+# shortest such path from cell to goal, or -1 if there is none.
+#
+# A state is (cell, time, where the chasing Wumpus could be). Moves
+# all cost 1, so every path to a state has the same cost, and a state
+# only needs to be queued once.
+#
+# Returns the moves, which either reach goal or stop at the horizon.
+# If every path runs into a Wumpus within the horizon, returns the one
+# that stays clear longest, which is [] if there is no safe first move.
+def plan(successors, start, goal, passable, distance, forecast, horizon):
+    tie = itertools.count()
+    first = (start, 0, forecast.chasers)
+    parent = {first: None}
+    queue = [(0, next(tie), first)]
+    deepest = first
+    while queue:
+        priority, _, state = heapq.heappop(queue)
+        current, time, chasers = state
+        if current == goal or time == horizon:
+            deepest = state
+            break
+        if time > deepest[1]:
+            deepest = state
+        for move, cell in successors[current]:
+            if not passable(cell) or forecast.unsafe(cell, time + 1):
+                continue
+            rest = distance(cell)
+            if rest < 0:
+                continue
+            after = forecast.chase(chasers, cell)
+            if after is None:
+                continue
+            nextState = (cell, time + 1, after)
+            if nextState in parent:
+                continue
+            parent[nextState] = (state, move)
+            heapq.heappush(queue, (time + 1 + rest, next(tie), nextState))
+
+    path = []
+    state = deepest
+    while parent[state] is not None:
+        state, move = parent[state]
+        path.append(move)
+    path.reverse()
+    return path
@@ -0,0 +1,141 @@
+# tour.py
+#
+# Choosing the order in which Link visits the gold.
+#
+# Heading for the nearest gold each time can leave Link criss-crossing
+# the dungeon when there is a lot of gold. Given the cost of getting
+# from Link to each gold, and from each gold to each other, planTour
+# finds an order that makes the whole trip short. Link does not need
+# to come back, so the trip is an open path starting at Link.
+#
+# Up to EXACT_LIMIT gold the order is the best possible, found by
+# dynamic programming over sets of gold (Held-Karp), which takes
+# time proportional to 2^n * n^2. Beyond that the order is built by
+# inserting each gold where it adds least to the trip, and then
+# improved by 2-opt, reversing stretches of the trip while that makes
+# it shorter.
+#
+# Costs do not have to be symmetric, but they have to be finite: use
+# a large number for a leg that can't be made.
+
+# Largest number of gold to find the best order for.
+EXACT_LIMIT = 10
+
+# The order to visit gold 0 to n-1 in, as a list of gold numbers.
+# start[i] is the cost of getting from Link to gold i, and cost[i][j]
+# the cost of getting from gold i to gold j.
+def planTour(start, cost):
+    if len(start) <= EXACT_LIMIT:
+        return heldKarp(start, cost)
+    return twoOpt(start, cost, insertion(start, cost))
+
+# The cost of visiting the gold in the given order.
+def tourCost(start, cost, order):
+    if not order:
+        return 0
+    total = start[order[0]]
+    for i in range(1, len(order)):
+        total += cost[order[i - 1]][order[i]]
+    return total
+
+# The best order. best[mask][j] is the cost of the cheapest trip that
+# visits the gold in mask and ends at gold j.
+def heldKarp(start, cost):
+    n = len(start)
+    if n == 0:
+        return []
+    full = (1 << n) - 1
+    infinity = float('inf')
+    best = [[infinity] * n for mask in range(full + 1)]
+    previous = [[-1] * n for mask in range(full + 1)]
+    for j in range(n):
+        best[1 << j][j] = start[j]
+    for mask in range(1, full + 1):
+        row = best[mask]
+        for j in range(n):
+            here = row[j]
+            if here == infinity:
+                continue
+            costJ = cost[j]
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                other = mask | (1 << k)
+                if here + costJ[k] < best[other][k]:
+                    best[other][k] = here + costJ[k]
+                    previous[other][k] = j
+
+    # Find the best place to finish and follow the trip back.
+    end = min(range(n), key=lambda j: best[full][j])
+    order = []
+    mask = full
+    while end >= 0:
+        order.append(end)
+        end, mask = previous[mask][end], mask & ~(1 << end)
+    order.reverse()
+    return order
+
+# A good order, built by taking the gold nearest Link first and
+# putting each in the place in the trip where it adds least.
+def insertion(start, cost):
+    order = []
+    for gold in sorted(range(len(start)), key=lambda i: start[i]):
+        if not order:
+            order.append(gold)
+            continue
+        # Put it first, ...
+        bestPlace = 0
+        bestAdded = start[gold] + cost[gold][order[0]] - start[order[0]]
+        # ... between two gold, ...
+        for i in range(1, len(order)):
+            a = order[i - 1]
+            b = order[i]
+            added = cost[a][gold] + cost[gold][b] - cost[a][b]
+            if added < bestAdded:
+                bestPlace = i
+                bestAdded = added
+        # ... or last.
+        if cost[order[-1]][gold] < bestAdded:
+            bestPlace = len(order)
+        order.insert(bestPlace, gold)
+    return order
+
+# Improve order by reversing stretches of it while that makes the trip
+# shorter. Since the costs need not be symmetric, the cost of a
+# stretch run backwards is kept alongside the cost run forwards, as
+# running totals along the trip, so each possible reversal is priced
+# in constant time.
+def twoOpt(start, cost, order):
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        forward = [0] * n
+        backward = [0] * n
+        for k in range(1, n):
+            forward[k] = forward[k - 1] + cost[order[k - 1]][order[k]]
+            backward[k] = backward[k - 1] + cost[order[k]][order[k - 1]]
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                # Reverse order[i..j]. What leads into it is Link
+                # (i == 0) or order[i - 1], and what follows is
+                # order[j + 1], if anything.
+                if i == 0:
+                    old = start[order[i]]
+                    new = start[order[j]]
+                else:
+                    old = cost[order[i - 1]][order[i]]
+                    new = cost[order[i - 1]][order[j]]
+                old += forward[j] - forward[i]
+                new += backward[j] - backward[i]
+                if j + 1 < n:
+                    old += cost[order[j]][order[j + 1]]
+                    new += cost[order[i]][order[j + 1]]
+                if new < old:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = True
+                    break
+            if improved:
+                break
+    return order
@@ -9,7 +9,6 @@
 
 import random
 import math
-import copy
 from enum import Enum
 
 # Representation of directions.
@@ -30,26 +29,66 @@ class State(Enum):
     LOST = 2
 
 # Class to represent the position of elements within the game
+#
+# Poses are compared and hashed by location, so they can go in sets
+# and be used as dictionary keys. That only works because x and y
+# cannot be changed once a Pose is made --- to move something, make a
+# new Pose. cost is not part of the identity, and searches are free to
+# set it.
 class Pose():
-    x = 0
-    y = 0
-    cost = 0
+    __slots__ = ('x', 'y', 'cost')
+
+    def __init__(self, x=0, y=0, cost=0):
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
+        object.__setattr__(self, 'cost', cost)
+    def __setattr__(self, name, value):
+        if name != 'cost':
+            raise AttributeError("Pose locations can't be changed, make a new Pose instead")
+        object.__setattr__(self, name, value)
+    def __eq__(self, other):
+        if not isinstance(other, Pose):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+    def __hash__(self):
+        return hash((self.x, self.y))
     def __lt__(self, other):
         return self.cost < other.cost
     def __gt__(self, other):
         return self.cost > other.cost
+    # Needed for copy, deepcopy and pickle, since __setattr__ blocks
+    # the default way of rebuilding the slots.
+    def __reduce__(self):
+        return (Pose, (self.x, self.y, self.cost))
+    def __repr__(self):
+        return 'Pose(' + str(self.x) + ', ' + str(self.y) + ')'
     def print(self):
         print('Cost:',self.cost,'[', self.x, ',', self.y, ']')
 
+    # The cell id of this pose in a world that is width cells wide.
+    def toCell(self, width):
+        return cellId(self.x, self.y, width)
+
+    # The pose at a given cell id.
+    @staticmethod
+    def fromCell(cell, width):
+        return Pose(cell % width, cell // width)
+
+# Cells can also be identified by a single integer, y*width + x. This
+# is what the World index and the searches use in their inner loops,
+# since ints are much cheaper to make, hash and compare than Poses.
+def cellId(x, y, width):
+    return y * width + x
+
+def cellX(cell, width):
+    return cell % width
+
+def cellY(cell, width):
+    return cell // width
+
 # Check if two game elements are in the same location
 def sameLocation(pose1, pose2):
-    if pose1.x == pose2.x:
-        if pose1.y == pose2.y:
-            return True
-        else:
-            return False
-    else:
-        return False
+    return pose1.x == pose2.x and pose1.y == pose2.y
 
 # Define the order over two locations/poses by distance from
 # origin. Helpful if we need to sort them and only care about having a
@@ -71,41 +110,43 @@ def checkBounds(max, dimension):
 
     return dimension
 
+# Make the random number generator for one run.
+#
+# Each run gets its own stream, worked out from a base seed and the
+# number of the run, so that a run gives the same result whatever ran
+# before it. Run 0 is seeded with the base seed itself, which gives
+# the same sequence as random.seed(baseSeed) --- so the first run with
+# a given seed plays out as it always has. Later runs are seeded with
+# a string, which random.Random hashes, so nearby seeds and run
+# numbers still give unrelated streams.
+def makeRng(baseSeed, run=0):
+    if run == 0:
+        return random.Random(baseSeed)
+    return random.Random(str(baseSeed) + '/' + str(run))
+
 # Pick a location in the range [0, x] and [0, y]
 #
-# Used to randomize the initial conditions.
-def pickRandomPose(x, y):
-    p = Pose()
-    p.x = random.randint(0, x)
-    p.y = random.randint(0, y)
+# Used to randomize the initial conditions. rng can be anything with
+# the methods of the random module.
+def pickRandomPose(x, y, rng=random):
+    px = rng.randint(0, x)
+    py = rng.randint(0, y)
 
-    return p
+    return Pose(px, py)
 
 # Pick a unique location, in the range [0, x] and [0, y], given a list
-# of locations that have already been chosen.
-def pickUniquePose(x, y, taken):
+# (or, much faster, a set) of locations that have already been chosen.
+def pickUniquePose(x, y, taken, rng=random):
     uniqueChoice = False
     while(not uniqueChoice):
-        candidatePose = pickRandomPose(x, y)
-        # Don't seem to be able to use 'in' here. I suspect it is
-        # because of the way __contains__ checks for equality.
+        candidatePose = pickRandomPose(x, y, rng)
         if not containedIn(candidatePose, taken):
             uniqueChoice = True
     return candidatePose
 
 # Check if a pose with the same x and y is already in poseList.
-#
-# There should be a way to do this with in/__contains__ by overloading
-# the relevant equality operator for pose, but that is for another
-# time.
 def containedIn(pose, poseList):
-    contained = False
-    for poses in poseList:
-        if sameLocation(pose, poses):
-            contained = True
-            #print(pose, "and", poses, "are (both) at (", pose.x, ",
-            #", pose.y, ") and (", pose.x, ", ", pose.y, ")")
-    return contained
+    return pose in poseList
 
 # Print out game state information. Not so useful given
 # the graphical display, but might come in handy.
@@ -158,15 +199,7 @@ def sameLink(state1, state2):
         return False
     
 # The wumpus in two states are the same if for every wumpus in state1
-# there is a wumpus with the same location in state 2. We need to sort
-# by location to check this, and we need to create copies because sort
-# has side-effects.
+# there is a wumpus with the same location in state 2, which is when
+# the sorted tuples of their cells (see World.wumpusCells) are equal.
 def sameWumpus(state1, state2):
-    state3 = copy.deepcopy(state1)
-    state4 = copy.deepcopy(state2)
-    state3.wLoc.sort(key=ltPose)
-    state4.wLoc.sort(key=ltPose)
-    for i in range(len(state3.wLoc)):
-        if not sameLocation(state3.wLoc[i], state4.wLoc[i]):
-            return False
-    return True
+    return state1.wumpusCells() == state2.wumpusCells()
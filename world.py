@@ -9,55 +9,126 @@
 
 import random
 import config
+import events
 import utils
 from utils import Pose
 from utils import Directions
 from utils import State
 
+# Bits used in the occupancy index to record what is in a cell.
+PIT    = 1
+WUMPUS = 2
+GOLD   = 4
+
 class World():
 
-    def __init__(self):
+    def __init__(self, rng=None):
 
         # Import boundaries of the world. because we index from 0,
         # these are one less than the number of rows and columns.
         self.maxX = config.worldLength - 1
         self.maxY = config.worldBreadth - 1
-
-        # Keep a list of locations that have been used.
-        self.locationList = []
+        self.width = self.maxX + 1
+        self.height = self.maxY + 1
+
+        # Where random choices come from: the layout, the moves of the
+        # Wumpus, and Link slipping when motion is nondeterministic.
+        # Anything with the same methods as the random module will do.
+        # Giving each world its own random.Random (see utils.makeRng)
+        # makes a run independent of any runs before it, so it can be
+        # replayed, or run in parallel with others, and give the same
+        # result. By default it is the random module itself.
+        if rng is None:
+            rng = random
+        self.rng = rng
+
+        # Pick distinct locations for everything, in the order Wumpus,
+        # Link, gold, pits, and keep the list of locations that have
+        # been used.
+        numberOfWumpus = config.numberOfWumpus
+        numberOfGold = config.numberOfGold
+        needed = numberOfWumpus + 1 + numberOfGold + config.numberOfPits
+        if needed > self.width * self.height:
+            raise ValueError("Can't fit " + str(needed) + " things into a " + str(self.width) + " by " + str(self.height) + " world")
+        if config.legacyLayout:
+            self.locationList = self.pickLegacyLocations(needed)
+        else:
+            self.locationList = self.pickLocations(needed)
 
         # Wumpus locations within the world
-        self.wLoc = []
-        for i in range(config.numberOfWumpus):
-            newLoc = utils.pickUniquePose(self.maxX, self.maxY, self.locationList)
-            self.wLoc.append(newLoc)
-            self.locationList.append(newLoc)
+        self.wLoc = self.locationList[:numberOfWumpus]
 
         # Link location
-        newLoc = utils.pickUniquePose(self.maxX, self.maxY, self.locationList)
-        self.lLoc = newLoc
-        self.locationList.append(newLoc)
+        self.lLoc = self.locationList[numberOfWumpus]
 
         # Gold location
-        self.gLoc = []
-        for i in range(config.numberOfGold):
-            newLoc = utils.pickUniquePose(self.maxX, self.maxY, self.locationList)
-            self.gLoc.append(newLoc)
-            self.locationList.append(newLoc)
+        self.gLoc = self.locationList[numberOfWumpus + 1:numberOfWumpus + 1 + numberOfGold]
 
         # Pit locations
-        self.pLoc = []
-        for i in range(config.numberOfPits):
-            newLoc = utils.pickUniquePose(self.maxX, self.maxY, self.locationList)
-            self.pLoc.append(newLoc)
-            self.locationList.append(newLoc)
-
+        self.pLoc = self.locationList[numberOfWumpus + 1 + numberOfGold:]
+
+        self.startGame()
+
+    # Make a world with a given layout instead of a random one, for
+    # example to replay a recorded game. Locations are given as cell
+    # ids: link is a single cell, wumpus, gold and pits are lists.
+    @classmethod
+    def fromLayout(cls, width, height, link, wumpus, gold, pits, rng=None):
+        world = object.__new__(cls)
+        world.maxX = width - 1
+        world.maxY = height - 1
+        world.width = width
+        world.height = height
+        if rng is None:
+            rng = random
+        world.rng = rng
+        world.wLoc = [world.poseOf(cell) for cell in wumpus]
+        world.lLoc = world.poseOf(link)
+        world.gLoc = [world.poseOf(cell) for cell in gold]
+        world.pLoc = [world.poseOf(cell) for cell in pits]
+        world.locationList = world.wLoc + [world.lLoc] + world.gLoc + world.pLoc
+        world.startGame()
+        return world
+
+    # Set up the game state and the tables that go with a layout, once
+    # the locations are in place.
+    def startGame(self):
         # Game state
         self.status = State.PLAY
 
         # Did Link just successfully loot some gold?
         self.looted = False
-        
+
+        # For each cell, the (direction, cell) pairs that a move can
+        # reach without leaving the world. Searches use this rather
+        # than making a new Pose for every neighbour.
+        self.successors = self.buildSuccessors()
+
+        # Index of what is in each cell, and of what can be sensed in
+        # each cell, so that hazard and percept queries do not have
+        # to scan the location lists.
+        self.indexOccupants()
+
+    # Pick count distinct locations in one pass, by sampling cell ids
+    # without replacement.
+    def pickLocations(self, count):
+        cells = self.rng.sample(range(self.width * self.height), count)
+        return [self.poseOf(cell) for cell in cells]
+
+    # Pick count distinct locations the way earlier versions did, by
+    # picking random locations until an unused one comes up. This
+    # makes exactly the same random calls as before, so a given seed
+    # gives the same layout, but checks for used locations with a set
+    # rather than by scanning a list.
+    def pickLegacyLocations(self, count):
+        locations = []
+        taken = set()
+        for i in range(count):
+            newLoc = utils.pickUniquePose(self.maxX, self.maxY, taken, self.rng)
+            locations.append(newLoc)
+            taken.add(newLoc)
+        return locations
+
     #
     # Access Methods
     #
@@ -100,6 +171,47 @@ class World():
     # Does Link see the glitter?
     def linkGlitter(self):
         return self.isGlitter(self.lLoc)
+
+    # What Link can tell about the world when config.partialVisibility
+    # is set, having last moved in direction heading.
+    #
+    # Link feels the percepts in their own cell, and sees what is in
+    # the cells up to config.forwardLimit ahead of them and
+    # config.sideLimit to either side (their own cell included). The
+    # cells seen, and the pits, Wumpus and gold in them, are returned
+    # as bitsets: ints with bit c set for cell c. So the result is:
+    #
+    # (cell, smelly, windy, glitter, seen, pits, wumpus, gold)
+    def observe(self, heading):
+        x = self.lLoc.x
+        y = self.lLoc.y
+        if heading == Directions.NORTH:
+            fx, fy = 0, 1
+        elif heading == Directions.SOUTH:
+            fx, fy = 0, -1
+        elif heading == Directions.EAST:
+            fx, fy = 1, 0
+        else:
+            fx, fy = -1, 0
+        seen = pits = wumpus = gold = 0
+        for ahead in range(config.forwardLimit + 1):
+            for side in range(-config.sideLimit, config.sideLimit + 1):
+                # Sideways is at right angles to ahead.
+                cx = x + ahead * fx + side * fy
+                cy = y + ahead * fy + side * fx
+                if 0 <= cx <= self.maxX and 0 <= cy <= self.maxY:
+                    cell = cy * self.width + cx
+                    bit = 1 << cell
+                    seen |= bit
+                    occupant = self.occupancy[cell]
+                    if occupant & PIT:
+                        pits |= bit
+                    if occupant & WUMPUS:
+                        wumpus |= bit
+                    if occupant & GOLD:
+                        gold |= bit
+        return (self.cellOf(self.lLoc), self.linkSmelly(), self.linkWindy(),
+                self.linkGlitter(), seen, pits, wumpus, gold)
  
     #
     # Methods
@@ -114,14 +226,14 @@ class World():
         # Has Link met the Wumpus?
         for i in range(len(self.wLoc)):
             if utils.sameLocation(self.lLoc, self.wLoc[i]):
-                print("Oops! Met the Wumpus at [", self.lLoc.x, ',', self.lLoc.y, "]")
+                events.info("Oops! Met the Wumpus at [ %d , %d ]", self.lLoc.x, self.lLoc.y)
                 dead = True
                 self.status = State.LOST
                 
         # Did Link fall in a Pit?
         for i in range(len(self.pLoc)):
             if utils.sameLocation(self.lLoc, self.pLoc[i]):
-                print("Arghhhhh! Fell in a pit at [", self.lLoc.x, ',', self.lLoc.y, "]")
+                events.info("Arghhhhh! Fell in a pit at [ %d , %d ]", self.lLoc.x, self.lLoc.y)
                 dead = True
                 self.status = State.LOST
 
@@ -131,7 +243,7 @@ class World():
             self.status = State.WON
             
         if dead == True or won == True:
-            print("Game Over!")
+            events.info("Game Over!")
             return True
             
     # Implements the move chosen by Link
@@ -140,21 +252,24 @@ class World():
         self.looted = False
         # Implement non-determinism if appropriate
         direction = self.probabilisticMotion(direction)
+        x = self.lLoc.x
+        y = self.lLoc.y
         if direction == Directions.NORTH:
-            if self.lLoc.y < self.maxY:
-                self.lLoc.y = self.lLoc.y + 1
+            if y < self.maxY:
+                y = y + 1
             
         if direction == Directions.SOUTH:
-            if self.lLoc.y > 0:
-                self.lLoc.y = self.lLoc.y - 1
+            if y > 0:
+                y = y - 1
                 
         if direction == Directions.EAST:
-            if self.lLoc.x < self.maxX:
-                self.lLoc.x = self.lLoc.x + 1
+            if x < self.maxX:
+                x = x + 1
                 
         if direction == Directions.WEST:
-            if self.lLoc.x > 0:
-                self.lLoc.x = self.lLoc.x - 1
+            if x > 0:
+                x = x - 1
+        self.lLoc = Pose(x, y)
 
         # Did Link just loot some gold?
         match = False
@@ -164,18 +279,21 @@ class World():
                 match = True
                 index = i
                 self.looted = True
-                print("Gold, yeah!")
+                events.info("Gold, yeah!")
 
         # Assumes that golds have different locations. Or, that only
         # one gold can be picked up in a given turn.
         if match:
-            self.gLoc.pop(index)
+            gold = self.gLoc.pop(index)
+            cell = self.cellIndex(gold.x, gold.y)
+            self.occupancy[cell] &= ~GOLD
+            self.spreadPercept(self.glitter, cell, -1)
 
     # Implement nondeterministic motion, if appropriate. This is not
     # really used at the moment.
     def probabilisticMotion(self, direction):
         if config.nonDeterministic:
-            dice = random.random()
+            dice = self.rng.random()
             if dice < config.directionProbability:
                 return direction
             else:
@@ -186,7 +304,7 @@ class World():
     # Move at 90 degrees to the original direction.
     def sideMove(self, direction):
         # Do we head left or right of the intended direction?
-        dice =  random.random()
+        dice =  self.rng.random()
         if dice > 0.5:
             left = True
         else:
@@ -230,21 +348,24 @@ class World():
     # Head towards Link 
     def moveToLink(self, i):
         target = self.lLoc
+        x = self.wLoc[i].x
+        y = self.wLoc[i].y
         # If same x-coordinate, move in the y direction
-        if self.wLoc[i].x == target.x:
-            self.wLoc[i].y = self.reduceDifference(self.wLoc[i].y, target.y)        
+        if x == target.x:
+            y = self.reduceDifference(y, target.y)
         # If same y-coordinate, move in the x direction
-        elif self.wLoc[i].y == target.y:
-            self.wLoc[i].x = self.reduceDifference(self.wLoc[i].x, target.x)        
+        elif y == target.y:
+            x = self.reduceDifference(x, target.x)
         # If x and y both differ, approximate a diagonal
         # approach by randomising between moving in the x and
         # y direction.
         else:
-            dice = random.random()
+            dice = self.rng.random()
             if dice > 0.5:
-                self.wLoc[i].y = self.reduceDifference(self.wLoc[i].y, target.y)        
+                y = self.reduceDifference(y, target.y)
             else:
-                self.wLoc[i].x = self.reduceDifference(self.wLoc[i].x, target.x)        
+                x = self.reduceDifference(x, target.x)
+        self.placeWumpus(i, x, y)
 
     # Move value towards target.
     def reduceDifference(self, value, target):
@@ -258,40 +379,287 @@ class World():
     # Randomly pick to change either x or y coordinate, and then
     # randomly make a change in that coordinate.
     def makeRandomMove(self, i):
-        dice = random.random()
+        x = self.wLoc[i].x
+        y = self.wLoc[i].y
+        dice = self.rng.random()
         if dice > 0.5:
-            xChange = random.randint(0, 2) - 1
-            self.wLoc[i].x = utils.checkBounds(self.maxX, self.wLoc[i].x - xChange)
+            xChange = self.rng.randint(0, 2) - 1
+            x = utils.checkBounds(self.maxX, x - xChange)
         else:
-            yChange = random.randint(0, 2) - 1
-            self.wLoc[i].y = utils.checkBounds(self.maxY, self.wLoc[i].y - yChange)
+            yChange = self.rng.randint(0, 2) - 1
+            y = utils.checkBounds(self.maxY, y - yChange)
+        self.placeWumpus(i, x, y)
 
+    # Put Wumpus i at (x, y), keeping the occupancy index and the
+    # stench layer in step.
+    #
+    # Several Wumpus can share a cell, so we count them and only clear
+    # the WUMPUS bit when the last one leaves. The stench layer is a
+    # count too, so it only needs changing around the two cells
+    # involved.
+    def placeWumpus(self, i, x, y):
+        old = self.cellIndex(self.wLoc[i].x, self.wLoc[i].y)
+        self.wLoc[i] = Pose(x, y)
+        new = self.cellIndex(x, y)
+        if new == old:
+            return
+        self.wumpusCount[old] -= 1
+        if self.wumpusCount[old] == 0:
+            self.occupancy[old] &= ~WUMPUS
+        self.spreadPercept(self.stench, old, -1)
+        self.wumpusCount[new] += 1
+        self.occupancy[new] |= WUMPUS
+        self.spreadPercept(self.stench, new, 1)
+
+    #
+    # Occupancy index and percept layers
+    #
+    # occupancy is a flat list with one entry per cell, holding PIT,
+    # WUMPUS and GOLD bits.
+    #
+    # stench, breeze and glitter are flat lists with one entry per
+    # cell, holding the number of Wumpus, pits and gold next to the
+    # cell. A cell is smelly, windy or glitters when its count is
+    # above zero. Pits never move, so breeze never changes; stench and
+    # glitter are updated by delta as Wumpus move and gold is looted.
+    #
+    # updateLink, updateWumpus and placeWumpus keep all of these up to
+    # date. Anything that changes wLoc, pLoc or gLoc directly should
+    # call indexOccupants() afterwards.
+
+    # Rebuild the index and the percept layers from the location
+    # lists.
+    def indexOccupants(self):
+        cells = self.width * self.height
+        self.occupancy = [0] * cells
+        self.wumpusCount = [0] * cells
+        self.stench = [0] * cells
+        self.breeze = [0] * cells
+        self.glitter = [0] * cells
+        for loc in self.pLoc:
+            cell = self.cellIndex(loc.x, loc.y)
+            self.occupancy[cell] |= PIT
+            self.spreadPercept(self.breeze, cell, 1)
+        for loc in self.gLoc:
+            cell = self.cellIndex(loc.x, loc.y)
+            self.occupancy[cell] |= GOLD
+            self.spreadPercept(self.glitter, cell, 1)
+        for loc in self.wLoc:
+            cell = self.cellIndex(loc.x, loc.y)
+            self.wumpusCount[cell] += 1
+            self.occupancy[cell] |= WUMPUS
+            self.spreadPercept(self.stench, cell, 1)
+
+    # Add delta to the percept layer in every cell next to cell.
+    def spreadPercept(self, layer, cell, delta):
+        for move, neighbour in self.successors[cell]:
+            layer[neighbour] += delta
+
+    # The cells Link should keep out of this turn, as a list of
+    # booleans indexed by cell id: anything smelly, holding a Wumpus
+    # or pit, or (unless allowWindy) windy. This is what Link's
+    # searches test cell by cell, worked out for the whole grid at
+    # once.
+    def dangerMap(self, allowWindy=False):
+        hazard = PIT | WUMPUS
+        if allowWindy:
+            return [s > 0 or o & hazard != 0
+                    for s, o in zip(self.stench, self.occupancy)]
+        return [s > 0 or b > 0 or o & hazard != 0
+                for s, b, o in zip(self.stench, self.breeze, self.occupancy)]
+
+    #
+    # Snapshots
+    #
+    # Planners that look ahead need to try moves and then undo them.
+    # Rather than deepcopy a whole World, they can take a snapshot of
+    # the parts that change --- Link, the Wumpus, the gold, and the
+    # game state --- and restore it later, or clone a World that
+    # shares everything that does not change.
+
+    # A snapshot is a flat tuple:
+    #
+    # (Link cell, status, looted, Wumpus cells..., gold cells...)
+    #
+    # The number of Wumpus never changes, so the gold cells are
+    # whatever comes after them.
+    def snapshot(self):
+        return ((self.cellOf(self.lLoc), self.status, self.looted)
+                + tuple([self.cellOf(loc) for loc in self.wLoc])
+                + tuple([self.cellOf(loc) for loc in self.gLoc]))
+
+    # Put the world back into the state recorded by snapshot(). The
+    # occupancy index and percept layers are updated by delta, so this
+    # costs time in proportion to the number of Wumpus and gold, not
+    # the size of the grid.
+    def restore(self, token):
+        width = self.width
+        self.lLoc = self.poseOf(token[0])
+        self.status = token[1]
+        self.looted = token[2]
+
+        numberOfWumpus = len(self.wLoc)
+        for i in range(numberOfWumpus):
+            cell = token[3 + i]
+            loc = self.wLoc[i]
+            if cell != loc.y * width + loc.x:
+                self.placeWumpus(i, cell % width, cell // width)
+
+        gold = token[3 + numberOfWumpus:]
+        current = [self.cellOf(loc) for loc in self.gLoc]
+        if list(gold) != current:
+            for cell in current:
+                if cell not in gold:
+                    self.occupancy[cell] &= ~GOLD
+                    self.spreadPercept(self.glitter, cell, -1)
+            for cell in gold:
+                if cell not in current:
+                    self.occupancy[cell] |= GOLD
+                    self.spreadPercept(self.glitter, cell, 1)
+            self.gLoc = [self.poseOf(cell) for cell in gold]
+
+    # A copy of this world that can be changed without changing this
+    # one. The pits, the bounds, the successors table and the breeze
+    # layer never change, so they are shared; only the state that
+    # moves is copied. Poses cannot be changed, so lists of them only
+    # need a shallow copy.
+    #
+    # By default the copy draws from the same rng as this world; pass
+    # another one to keep the copy's random choices separate.
+    def clone(self, rng=None):
+        twin = object.__new__(type(self))
+        twin.__dict__.update(self.__dict__)
+        twin.wLoc = list(self.wLoc)
+        twin.gLoc = list(self.gLoc)
+        twin.occupancy = list(self.occupancy)
+        twin.wumpusCount = list(self.wumpusCount)
+        twin.stench = list(self.stench)
+        twin.glitter = list(self.glitter)
+        if rng is not None:
+            twin.rng = rng
+        return twin
+
+    # Worlds that use the random module for their random choices
+    # can't be pickled or deep-copied as they stand, since modules
+    # can't be. Store None in its place, and put the module back when
+    # the world is rebuilt.
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if state['rng'] is random:
+            state['rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
+    # Flat index of the cell at (x, y), or -1 if (x, y) is outside
+    # the world.
+    def cellIndex(self, x, y):
+        if 0 <= x <= self.maxX and 0 <= y <= self.maxY:
+            return utils.cellId(x, y, self.width)
+        return -1
+
+    # Cell id of a location, and the location of a cell id. See
+    # utils.cellId.
+    def cellOf(self, location):
+        return utils.cellId(location.x, location.y, self.width)
+
+    def poseOf(self, cell):
+        return Pose.fromCell(cell, self.width)
+
+    # Where the Wumpus are, as a sorted tuple of cell ids. The Wumpus
+    # are alike, so this is the same for any two worlds with Wumpus in
+    # the same places, whichever Wumpus is where, and comparing or
+    # hashing it is cheap.
+    def wumpusCells(self):
+        return tuple(sorted([self.cellOf(loc) for loc in self.wLoc]))
+
+    # Work out the successors table. Directions are in the order
+    # NORTH, SOUTH, EAST, WEST, which is the order that Link and
+    # PuzzleWorld try moves in.
+    def buildSuccessors(self):
+        successors = []
+        for cell in range(self.width * self.height):
+            x = utils.cellX(cell, self.width)
+            y = utils.cellY(cell, self.width)
+            moves = []
+            if y < self.maxY:
+                moves.append((Directions.NORTH, cell + self.width))
+            if y > 0:
+                moves.append((Directions.SOUTH, cell - self.width))
+            if x < self.maxX:
+                moves.append((Directions.EAST, cell + 1))
+            if x > 0:
+                moves.append((Directions.WEST, cell - 1))
+            successors.append(tuple(moves))
+        return successors
+
+    # Is anything with the given bit at location?
+    def isOccupied(self, location, bit):
+        cell = self.cellIndex(location.x, location.y)
+        return cell >= 0 and self.occupancy[cell] & bit != 0
+
+    # Is anything with the given bit in one of the four cells next to
+    # location?
+    def nextToOccupant(self, location, bit):
+        x = location.x
+        y = location.y
+        occupancy = self.occupancy
+        width = self.width
+        if 0 <= x <= self.maxX:
+            if 0 <= y + 1 <= self.maxY and occupancy[(y + 1) * width + x] & bit:
+                return True
+            if 0 <= y - 1 <= self.maxY and occupancy[(y - 1) * width + x] & bit:
+                return True
+        if 0 <= y <= self.maxY:
+            if 0 <= x + 1 <= self.maxX and occupancy[y * width + x + 1] & bit:
+                return True
+            if 0 <= x - 1 <= self.maxX and occupancy[y * width + x - 1] & bit:
+                return True
+        return False
+
+    # Is there a Pit at the given location?
+    def isPit(self, location):
+        return self.isOccupied(location, PIT)
+
+    # Is there a Wumpus at the given location?
+    def isWumpus(self, location):
+        return self.isOccupied(location, WUMPUS)
+
+    # Is there Gold at the given location?
+    def isGold(self, location):
+        return self.isOccupied(location, GOLD)
 
     # Some additional information about the world which may be useful
     # for planning how to move Link.
     
     # Is the given location smelly?
     #
-    # A location is smelly if it is next to the Wumpus
+    # A location is smelly if it is next to the Wumpus. Locations
+    # inside the world are read off the percept layers; locations
+    # outside it (which a search might ask about) are worked out
+    # from the occupancy index.
     def isSmelly(self, location):
-        if self.isAjacent(self.wLoc, location):
-            return True
-        else:
-            return False
+        cell = self.cellIndex(location.x, location.y)
+        if cell < 0:
+            return self.nextToOccupant(location, WUMPUS)
+        return self.stench[cell] > 0
 
     # Is the given location windy? 
     def isWindy(self, location):
-        if self.isAjacent(self.pLoc, location):
-            return True
-        else:
-            return False
+        cell = self.cellIndex(location.x, location.y)
+        if cell < 0:
+            return self.nextToOccupant(location, PIT)
+        return self.breeze[cell] > 0
 
      # Does the given location glitter? 
     def isGlitter(self, location):
-        if self.isAjacent(self.gLoc, location):
-            return True
-        else:
-            return False
+        cell = self.cellIndex(location.x, location.y)
+        if cell < 0:
+            return self.nextToOccupant(location, GOLD)
+        return self.glitter[cell] > 0
                 
     # Is the location loc next to any of the locations in locList.
     #
@@ -299,19 +667,16 @@ class World():
     # x coordinate and have a y coordinate that differs by 1, or in
     # the same y coordinate and have an x coordinate that differs by
     # one.
+    #
+    # The is* methods above use the index and percept layers instead;
+    # this is kept for checking against arbitrary lists of locations.
     def isAjacent(self,locList, loc):
         for aloc in locList:
             # Ajacency holds if it holds for any location in locList.
             if aloc.x == loc.x:
                 if aloc.y == loc.y + 1 or aloc.y == loc.y - 1:
                     return True
-                else:
-                    return False
             elif aloc.y == loc.y:
                 if aloc.x == loc.x + 1 or aloc.x == loc.x - 1:
                     return True
-                else:
-                    return False
-            else:
-                return False
-            
+        return False
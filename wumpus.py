@@ -16,7 +16,12 @@ import puzzle
 import getopt
 import random
 import config
+import events
 import game
+import utils
+import recorder
+import replay
+import multiprocessing
 import sys
 
 #
@@ -29,6 +34,32 @@ def displayHelp():
     print("-p : runs the puzzle version of the wumpus world")
     print("-d : do not use the graphics (ie run headless)")
     print("-n <number> : runs either the -p or the -g version <number> of times. Note that <number> should be an integer")
+    print("-s <seed> : base seed for the random numbers of each run (default is myId in config.py)")
+    print("-j <number> : share the runs between <number> processes (implies -d)")
+    print("-t <file> : record every step of each run to <file> (with the run number added when there is more than one run, or in place of {run})")
+    print("-r <file> : replay a run recorded with -t, without running Link or the puzzle solver")
+    print("-k <step> : with -r, start the replay at step <step> (headless, just show the state at that step)")
+    print("-v : report every step, not just game events")
+    print("-q : only report problems")
+
+#
+# Run one game or puzzle.
+#
+# Each run gets its own random number generator, made from the base
+# seed and the run number, so its result does not depend on which runs
+# came before it or which process it runs in. This is also what the
+# worker processes run when -j is used, so it takes the settings it
+# needs as arguments rather than relying on changes made to config in
+# this process.
+def runOne(job):
+    wType, seed, run, headless, logLevel, stepEvents, tracePath = job
+    config.headless = headless
+    events.setup(logLevel, stepEvents)
+    rng = utils.makeRng(seed, run)
+    if wType == "game":
+        return game.main(rng, tracePath)
+    else:
+        return puzzle.main(rng, tracePath)
 
 def main():
     # Seed the random number generator.
@@ -37,11 +68,19 @@ def main():
     # ID and some other fixed values. But you probably want to comment
     # this out during development so you test under a variety of
     # conditions
+    #
+    # Each run makes its own generator from this seed (see runOne), but
+    # we still seed the random module for any code that uses it
+    # directly.
+    seed = config.myId
     random.seed(config.myId)
     
     # Set global flags to help parse the command line arguments
     wType = "none"
     count = 1
+    workers = 1
+    traceFile = None
+    replayStart = 0
     
     # Drop the filename from the list of command line arguments
     argList = sys.argv[1:]
@@ -49,10 +88,10 @@ def main():
     # We support a help option, running either the game version or the
     # puzzle version, running with no display, and possiblly running n
     # iterations.
-    options = "hgpdn:"
+    options = "hgpdn:s:j:t:r:k:vq"
 
     # Long options
-    long_options = ["Help", "Game", "Puzzle", "Headless", "Number"]
+    long_options = ["Help", "Game", "Puzzle", "Headless", "Number", "Seed", "Jobs", "Trace", "Replay", "Step", "Verbose", "Quiet"]
 
     try:
         # Parsing argument
@@ -76,18 +115,52 @@ def main():
             elif currentArgument in ("-n", "--Number"):
                 count = int(currentValue)
                 print(currentValue)
+
+            elif currentArgument in ("-s", "--Seed"):
+                seed = int(currentValue)
+
+            elif currentArgument in ("-j", "--Jobs"):
+                workers = int(currentValue)
+
+            elif currentArgument in ("-t", "--Trace"):
+                traceFile = currentValue
+
+            elif currentArgument in ("-r", "--Replay"):
+                wType = "replay"
+                traceFile = currentValue
+
+            elif currentArgument in ("-k", "--Step"):
+                replayStart = int(currentValue)
+
+            elif currentArgument in ("-v", "--Verbose"):
+                config.stepEvents = True
+
+            elif currentArgument in ("-q", "--Quiet"):
+                config.logLevel = "WARNING"
                 
     except getopt.error as err:
         # output error, and return with an error code
         print (str(err))
     
-    if wType != "none":
-        if wType == "game":
-            for i in range(count):
-                game.main()
-        elif wType == "puzzle":
-            for i in range(count):
-                puzzle.main()            
+    if wType == "replay":
+        replay.main(traceFile, replayStart)
+    elif wType != "none":
+        jobs = []
+        for i in range(count):
+            tracePath = None
+            if traceFile:
+                tracePath = recorder.runPath(traceFile, i, count)
+            jobs.append((wType, seed, i, config.headless or workers > 1, config.logLevel, config.stepEvents, tracePath))
+        if workers > 1:
+            # Windows can't be shared between processes, so parallel
+            # runs are always headless.
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(runOne, jobs)
+        else:
+            results = [runOne(job) for job in jobs]
+        if count > 1:
+            won = results.count(utils.State.WON)
+            print("Won", won, "of", count, "runs")
         
 if __name__ == "__main__":
     main()